@@ -0,0 +1,85 @@
+import json
+import time
+import hashlib
+from importlib import metadata
+from sqlite_store import SQLite_Store
+
+
+def package_version(name):
+    try:
+        return metadata.version(name)
+    except metadata.PackageNotFoundError:
+        return 'unknown'
+
+
+class Annotation_Cache(SQLite_Store):
+
+    schema = [
+        """
+        CREATE TABLE IF NOT EXISTS annotations (
+            key TEXT PRIMARY KEY, value TEXT, used REAL)
+        """,
+        """
+        CREATE INDEX IF NOT EXISTS annotations_used ON annotations(used)
+        """,
+    ]
+
+    def __init__(self, path='cache/annotations.sqlite', max_entries=5000000,
+                 batch_size=500, *args, **kwargs):
+        self.max_entries = max_entries
+        self.batch_size = batch_size
+        return super().__init__(path, *args, **kwargs)
+
+    def make_key(self, annotator, version, text):
+        text = f'{annotator}\0{version}\0{text}'
+        return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+    def get_many(self, keys):
+        connection = self.connect()
+        values = {}
+        for i in range(0, len(keys), self.batch_size):
+            batch = keys[i:i + self.batch_size]
+            placeholders = ','.join('?' * len(batch))
+            rows = connection.execute(
+                f'SELECT key, value FROM annotations WHERE key IN ({placeholders})', batch)
+            values.update((key, json.loads(value)) for key, value in rows)
+
+        with connection:
+            connection.executemany('UPDATE annotations SET used = ? WHERE key = ?',
+                                   [(time.time(), key) for key in values])
+        return values
+
+    def put_many(self, values):
+        connection = self.connect()
+        now = time.time()
+        with connection:
+            connection.executemany('INSERT OR REPLACE INTO annotations VALUES (?, ?, ?)',
+                                   [(key, json.dumps(value), now)
+                                    for key, value in values.items()])
+        self.evict()
+
+    def evict(self):
+        # Drop the least recently used annotations beyond the size bound
+        connection = self.connect()
+        count = connection.execute(
+            'SELECT COUNT(*) FROM annotations').fetchone()[0]
+        if count > self.max_entries:
+            with connection:
+                connection.execute("""
+                    DELETE FROM annotations WHERE key IN (
+                        SELECT key FROM annotations ORDER BY used LIMIT ?)
+                """, (count - self.max_entries,))
+
+    def map(self, annotator, version, extract, texts):
+        keys = {text: self.make_key(annotator, version, text)
+                for text in set(texts)}
+        cached = self.get_many(list(keys.values()))
+
+        # Only strings that were never annotated go through the annotator
+        missing = [text for text, key in keys.items() if key not in cached]
+        if missing:
+            computed = dict(zip((keys[text] for text in missing),
+                                extract(missing)))
+            self.put_many(computed)
+            cached.update(computed)
+        return [cached[keys[text]] for text in texts]
@@ -0,0 +1,182 @@
+import os
+import csv
+from citation_generator import Citation_Generator
+
+
+def read_rows(path):
+    # A missing output would silently import no nodes, or stale ones with
+    # --ignore-missing-nodes hiding the dangling relationships
+    if not os.path.exists(path):
+        raise FileNotFoundError(f'{path} is missing, run --parse --bulk-import')
+    with open(path, newline='', encoding='utf-8') as f:
+        for row in csv.reader(f):
+            yield [value if value != '' else None for value in row]
+
+
+def year_of(year):
+    # Rows with a non-numerical year are skipped, as extract_conferences
+    # drops them and LOAD CSV matches no venue for them
+    try:
+        return int(float(year))
+    except (TypeError, ValueError):
+        return None
+
+
+def date_of(year):
+    return f'{year_of(year)}-01-01'
+
+
+def end_date_of(year):
+    return f'{year_of(year)}-01-02'
+
+
+class Bulk_Import_Writer():
+
+    def __init__(self, output_dir='output', import_dir='output/import',
+                 citation_density=0.01, citation_exponent=None, seed=None,
+                 *args, **kwargs):
+        self.output_dir = output_dir
+        self.import_dir = import_dir
+        self.citation_generator = Citation_Generator(
+            density=citation_density, exponent=citation_exponent, seed=seed)
+        self.nodes = []
+        self.relationships = []
+        return super().__init__(*args, **kwargs)
+
+    def output(self, file_name):
+        return read_rows(os.path.join(self.output_dir, file_name))
+
+    def write(self, file_name, header, rows):
+        path = os.path.join(self.import_dir, file_name)
+        with open(path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow(header)
+            writer.writerows(rows)
+        return os.path.abspath(path)
+
+    def write_nodes(self, label, file_name, header, rows):
+        self.nodes.append((label, self.write(file_name, header, rows)))
+
+    def write_relationships(self, type, file_name, header, rows):
+        self.relationships.append((type, self.write(file_name, header, rows)))
+
+    def unique(self, rows, seen):
+        # Node IDs are natural keys, so the same node may appear many times
+        for row in rows:
+            if row[0] not in seen:
+                seen.add(row[0])
+                yield row
+
+    def conferences(self):
+        venues = {title: venue for title,
+                  venue in self.output('conference_venues.csv')}
+        for title, year in self.output('proceedings.csv'):
+            if year_of(year) is None:
+                continue
+            yield [f'{title}|{date_of(year)}', title, date_of(year),
+                   end_date_of(year), year, venues.get(title)]
+
+    def journals(self):
+        for title, year, volume in self.output('journals.csv'):
+            if year_of(year) is None:
+                continue
+            yield [f'{title}|{date_of(year)}|{volume}', title, date_of(year),
+                   volume]
+
+    def papers(self):
+        for row in self.output('conference_papers.csv'):
+            yield [row[0], row[1], row[4]]
+        for row in self.output('journal_papers.csv'):
+            yield [row[0], row[1], row[5]]
+
+    def paper_venues(self):
+        for row in self.output('conference_papers.csv'):
+            if year_of(row[3]) is not None:
+                yield ['Conference', f'{row[2]}|{date_of(row[3])}', row[0]]
+        for row in self.output('journal_papers.csv'):
+            if year_of(row[3]) is not None:
+                yield ['Journal', f'{row[2]}|{date_of(row[3])}|{row[4]}', row[0]]
+
+    def paper_keywords(self):
+        yield from self.output('conference_paper_keywords.csv')
+        yield from self.output('journal_paper_keywords.csv')
+
+    def authorships(self):
+        for file_name, is_corresponding in [
+                ('corresponding_conference_authors.csv', 'true'),
+                ('corresponding_journal_authors.csv', 'true'),
+                ('non_corresponding_conference_authors.csv', None),
+                ('non_corresponding_journal_authors.csv', None)]:
+            for key, author in self.output(file_name):
+                yield [author, key, is_corresponding]
+
+    def reviews(self):
+        for file_name in ['conference_paper_reviewers.csv',
+                          'journal_paper_reviewers.csv']:
+            for row in self.output(file_name):
+                yield [row[1], row[0]]
+
+    def citations(self, keys):
+        sources, targets = self.citation_generator.generate(len(keys))
+        for source, target in zip(sources, targets):
+            yield [keys[source], keys[target]]
+
+    def write_all(self):
+        print('Writing bulk import files...')
+        os.makedirs(self.import_dir, exist_ok=True)
+        self.nodes = []
+        self.relationships = []
+
+        self.write_nodes('Conference', 'conferences.csv',
+                         ['conferenceId:ID(Conference)', 'title', 'startDate',
+                          'endDate', 'edition', 'venue'],
+                         self.unique(self.conferences(), set()))
+        self.write_nodes('Journal', 'journals.csv',
+                         ['journalId:ID(Journal)', 'title', 'date', 'volume'],
+                         self.unique(self.journals(), set()))
+
+        keys = set()
+        self.write_nodes('Paper', 'papers.csv',
+                         ['key:ID(Paper)', 'title', 'abstract'],
+                         self.unique(self.papers(), keys))
+        self.write_nodes('Keyword', 'keywords.csv', ['keyword:ID(Keyword)'],
+                         self.unique(([keyword] for _, keyword in self.paper_keywords()), set()))
+        self.write_nodes('Author', 'authors.csv', ['name:ID(Author)'],
+                         self.unique(([author] for author, _, _ in self.authorships()), set()))
+        self.write_nodes('Organization', 'organizations.csv',
+                         ['name:ID(Organization)'],
+                         self.unique(self.output('schools.csv'), set()))
+
+        self.write_relationships('HAS', 'conference_papers.csv',
+                                 [':START_ID(Conference)', ':END_ID(Paper)'],
+                                 (row[1:] for row in self.paper_venues() if row[0] == 'Conference'))
+        self.write_relationships('HAS', 'journal_papers.csv',
+                                 [':START_ID(Journal)', ':END_ID(Paper)'],
+                                 (row[1:] for row in self.paper_venues() if row[0] == 'Journal'))
+        self.write_relationships('HAS', 'paper_keywords.csv',
+                                 [':START_ID(Paper)', ':END_ID(Keyword)'],
+                                 self.paper_keywords())
+        self.write_relationships('WRITE', 'write.csv',
+                                 [':START_ID(Author)', ':END_ID(Paper)',
+                                  'is_corresponding:boolean'],
+                                 self.authorships())
+        self.write_relationships('REVIEW', 'review.csv',
+                                 [':START_ID(Author)', ':END_ID(Paper)'],
+                                 self.reviews())
+        self.write_relationships('CITED_BY', 'cited_by.csv',
+                                 [':START_ID(Paper)', ':END_ID(Paper)'],
+                                 self.citations(sorted(keys)))
+        self.write_relationships('AFFILIATED_WITH', 'affiliated_with.csv',
+                                 [':START_ID(Author)', ':END_ID(Organization)'],
+                                 self.output('author_schools.csv'))
+        print('Bulk import files written.')
+
+    def command(self, database='graph.db'):
+        arguments = ['neo4j-admin import', f'--database={database}',
+                     '--id-type=STRING', '--multiline-fields=true',
+                     '--ignore-duplicate-nodes=true',
+                     '--ignore-missing-nodes=true']
+        arguments += [f'--nodes:{label}={path}' for label, path in self.nodes]
+        arguments += [f'--relationships:{type}={path}'
+                      for type, path in self.relationships]
+        return ' \\\n    '.join(arguments)
@@ -0,0 +1,74 @@
+import numpy as np
+
+
+class Citation_Generator():
+
+    def __init__(self, density=0.01, exponent=None, seed=None, max_rounds=100,
+                 *args, **kwargs):
+        self.density = density
+        self.exponent = exponent
+        self.random = np.random.RandomState(seed)
+        self.max_rounds = max_rounds
+        return super().__init__(*args, **kwargs)
+
+    def popularity(self, n):
+        weights = np.arange(1, n + 1, dtype=float) ** -self.exponent
+        return weights / weights.sum()
+
+    def check_reachable(self, n, sources, edges):
+        # Expected distinct targets per citing paper after every draw the
+        # rounds can make, a steep power law keeps drawing the same popular
+        # papers and cannot reach a high density
+        draws = self.max_rounds * (edges * 1.1 + 16) / len(sources)
+        reachable = np.sum(1 - (1 - self.popularity(n)) ** draws)
+        if reachable < edges / len(sources):
+            raise ValueError(
+                f'Density {self.density} is not reachable with exponent '
+                f'{self.exponent} for {n} papers, about {reachable:.0f} cited '
+                f'papers per paper can be drawn')
+
+    def target_sampler(self, n):
+        if self.exponent is None:
+            return lambda size: self.random.randint(0, n, size=size)
+
+        # Power-law popularity, papers are shuffled so rank is not file order
+        weights = self.popularity(n)
+        self.random.shuffle(weights)
+        cumulative = np.cumsum(weights)
+        cumulative /= cumulative[-1]
+        return lambda size: np.minimum(
+            np.searchsorted(cumulative, self.random.random_sample(size)), n - 1)
+
+    def generate(self, n, sources=None):
+        # Same expected edge count as keeping each ordered pair with
+        # probability density, but only the edges themselves are drawn.
+        # sources restricts the citing papers, e.g. to newly loaded ones.
+        sources = np.arange(n) if sources is None else np.asarray(sources)
+        if n < 2 or not len(sources):
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+        edges = self.random.binomial(len(sources) * (n - 1), self.density)
+        if self.exponent is not None:
+            self.check_reachable(n, sources, edges)
+        sample_targets = self.target_sampler(n)
+
+        codes = np.empty(0, dtype=np.int64)
+        for _ in range(self.max_rounds):
+            missing = edges - len(codes)
+            if missing <= 0:
+                break
+            size = int(missing * 1.1) + 16
+            citing = sources[self.random.randint(
+                0, len(sources), size=size)].astype(np.int64)
+            targets = sample_targets(size).astype(np.int64)
+            keep = citing != targets
+            codes = np.union1d(codes, citing[keep] * n + targets[keep])
+
+        # Fewer edges than drawn would thin out the density silently
+        if len(codes) < edges:
+            raise ValueError(
+                f'Drew {len(codes)} of {edges} citations in {self.max_rounds} '
+                f'rounds, density {self.density} is not reachable with '
+                f'exponent {self.exponent} for {n} papers')
+        if len(codes) > edges:
+            codes = self.random.choice(codes, size=edges, replace=False)
+        return codes // n, codes % n
@@ -0,0 +1,153 @@
+import os
+import csv
+import random
+
+
+# Columns written per source, the parsed ones plus a few DBLP columns the
+# reader skips
+OUTPUT_COLUMNS = {
+    'inproceedings': ['key', 'mdate', 'author', 'title', 'booktitle', 'year',
+                      'pages', 'ee', 'url'],
+    'article': ['key', 'mdate', 'author', 'title', 'journal', 'year',
+                'volume', 'number', 'pages', 'ee', 'url'],
+    'proceedings': ['key', 'mdate', 'editor', 'title', 'booktitle', 'year',
+                    'publisher', 'isbn', 'url'],
+    'school': ['school:string'],
+}
+
+# Authors per paper, roughly the DBLP distribution
+AUTHOR_COUNTS = [1, 2, 3, 4, 5, 6, 7, 8, 10, 12]
+AUTHOR_WEIGHTS = [14, 24, 24, 16, 9, 5, 3, 2, 2, 1]
+
+FIRST_NAMES = [
+    'Alice', 'Bob', 'Carlos', 'Daniela', 'Elena', 'Fatima', 'Gustavo', 'Hiro',
+    'Ingrid', 'Jun', 'Karim', 'Laura', 'Mei', 'Nikolai', 'Olga', 'Pedro',
+    'Qiang', 'Rosa', 'Sven', 'Tomas', 'Usha', 'Victor', 'Wei', 'Xavier',
+    'Yuki', 'Zoran', 'Anna', 'Marco', 'Sofia', 'Ahmed', 'Lucia', 'Jan',
+]
+
+LAST_NAMES = [
+    'Smith', 'Garcia', 'Wang', 'Müller', 'Rossi', 'Kim', 'Nguyen', 'Silva',
+    'Ivanov', 'Kowalski', 'Tanaka', 'Jensen', 'Dubois', 'Novak', 'Santos',
+    'Chen', 'Li', 'Zhang', 'Haddad', 'Papadopoulos', 'Fischer', 'Martin',
+    'Lopez', 'Yilmaz', 'Singh', 'Kumar', 'Andersson', 'Horvat', 'Costa',
+    'Schmidt', 'Moreau', 'Sato', 'Ali', 'Peters', 'Olsen', 'Bauer',
+]
+
+TITLE_WORDS = [
+    'graph', 'database', 'query', 'optimization', 'learning', 'neural',
+    'network', 'distributed', 'system', 'analysis', 'model', 'data',
+    'stream', 'processing', 'index', 'scalable', 'efficient', 'approach',
+    'framework', 'semantic', 'web', 'mining', 'algorithm', 'parallel',
+    'cloud', 'storage', 'transaction', 'privacy', 'security', 'sensor',
+    'mobile', 'recommendation', 'knowledge', 'reasoning', 'language',
+    'evaluation', 'benchmark', 'performance', 'memory', 'cache', 'search',
+    'ranking', 'clustering', 'classification', 'embedding', 'sparse',
+]
+
+TITLE_FILLERS = ['for', 'of', 'in', 'with', 'on', 'using', 'towards', 'and']
+
+CITIES = [
+    ('Barcelona', 'Spain'), ('Berlin', 'Germany'), ('Paris', 'France'),
+    ('Rome', 'Italy'), ('Vienna', 'Austria'), ('Prague', 'Czech Republic'),
+    ('Lisbon', 'Portugal'), ('Tokyo', 'Japan'), ('Seoul', 'South Korea'),
+    ('Toronto', 'Canada'), ('Chicago', 'USA'), ('Seattle', 'USA'),
+    ('Sydney', 'Australia'), ('Singapore', 'Singapore'), ('Dublin', 'Ireland'),
+    ('Amsterdam', 'Netherlands'), ('Stockholm', 'Sweden'), ('Helsinki', 'Finland'),
+]
+
+MONTHS = ['January', 'March', 'May', 'June', 'July', 'September', 'October',
+          'December']
+
+
+class DBLP_Generator():
+
+    def __init__(self, rows=10000, seed=0, *args, **kwargs):
+        # Synthetic DBLP exports in the semicolon-delimited layout of the
+        # input folder, rows is the number of papers per paper source
+        self.rows = rows
+        self.random = random.Random(seed)
+        self.authors = self.generate_authors(max(rows // 2, 10))
+        self.conferences = [f'CONF{i}' for i in range(max(rows // 200, 5))]
+        self.journals = [f'Journal of {self.random.choice(TITLE_WORDS).title()} '
+                         f'{self.random.choice(TITLE_WORDS).title()} {i}'
+                         for i in range(max(rows // 500, 5))]
+        return super().__init__(*args, **kwargs)
+
+    def generate_authors(self, n):
+        # Homonyms get a DBLP style number suffix
+        authors = set()
+        while len(authors) < n:
+            name = f'{self.random.choice(FIRST_NAMES)} {self.random.choice(LAST_NAMES)}'
+            if name in authors:
+                name = f'{name} {self.random.randint(1, 9999):04d}'
+            authors.add(name)
+        return sorted(authors)
+
+    def mdate(self):
+        return (f'{self.random.randint(2010, 2019)}-'
+                f'{self.random.randint(1, 12):02d}-{self.random.randint(1, 28):02d}')
+
+    def title(self):
+        length = max(3, min(int(self.random.gauss(10, 3)), 25))
+        words = [self.random.choice(TITLE_WORDS if i % 3 else TITLE_FILLERS + TITLE_WORDS)
+                 for i in range(length)]
+        return ' '.join(words).capitalize() + '.'
+
+    def author_list(self):
+        count = self.random.choices(AUTHOR_COUNTS, AUTHOR_WEIGHTS)[0]
+        return '|'.join(self.random.sample(self.authors, min(count, len(self.authors))))
+
+    def pages(self):
+        start = self.random.randint(1, 900)
+        return f'{start}-{start + self.random.randint(4, 20)}'
+
+    def inproceedings(self):
+        for i in range(self.rows):
+            booktitle = self.random.choice(self.conferences)
+            authors = self.author_list()
+            key = f'conf/{booktitle.lower()}/{authors.split()[1]}{i}'
+            yield [key, self.mdate(), authors, self.title(), booktitle,
+                   self.random.randint(1990, 2019), self.pages(),
+                   f'https://doi.org/10.1145/{i}', f'db/conf/{booktitle.lower()}.html']
+
+    def articles(self):
+        for i in range(self.rows):
+            journal = self.random.choice(self.journals)
+            year = self.random.randint(1990, 2019)
+            authors = self.author_list()
+            key = f'journals/j{self.journals.index(journal)}/{authors.split()[1]}{i}'
+            yield [key, self.mdate(), authors, self.title(), journal, year,
+                   year - 1980, self.random.randint(1, 12), self.pages(),
+                   f'https://doi.org/10.1007/{i}', f'db/journals/j{i}.html']
+
+    def proceedings(self):
+        for booktitle in self.conferences:
+            for year in range(1990, 2020):
+                city, country = self.random.choice(CITIES)
+                title = (f'Proceedings of the {booktitle} Conference, {city}, '
+                         f'{country}, {self.random.choice(MONTHS)} {year}')
+                yield [f'conf/{booktitle.lower()}/{year}', self.mdate(),
+                       self.random.choice(self.authors), title, booktitle,
+                       year, 'ACM', f'978-1-{year}', f'db/conf/{booktitle.lower()}.html']
+
+    def schools(self):
+        for city, _ in CITIES:
+            for word in TITLE_WORDS[:10]:
+                yield [f'{city} University of {word.title()}']
+
+    def write(self, directory='input'):
+        os.makedirs(directory, exist_ok=True)
+        for source, rows in [('inproceedings', self.inproceedings()),
+                             ('article', self.articles()),
+                             ('proceedings', self.proceedings()),
+                             ('school', self.schools())]:
+            path = os.path.join(directory, f'output_{source}.csv')
+            with open(path, 'w', newline='', encoding='utf-8') as f:
+                writer = csv.writer(f, delimiter=';')
+                writer.writerow(OUTPUT_COLUMNS[source])
+                writer.writerows(rows)
+
+        # Gazetteer for the offline venue extractor
+        with open(os.path.join(directory, 'cities.txt'), 'w', encoding='utf-8') as f:
+            f.writelines(f'{city}\n' for city, _ in CITIES)
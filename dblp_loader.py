@@ -1,13 +1,67 @@
+import os
+import numpy as np
 import pandas as pd
 import re
 import lorem
-from gensim.utils import deaccent
-from nameparser import HumanName
-import nltk
-import geograpy
-import spacy
 import random
 from collections import Counter
+from itertools import chain
+from dblp_reader import DBLP_Reader, DELTA_SOURCES
+from delta_state import Delta_State
+from annotation_cache import Annotation_Cache, package_version
+import keyword_extractor
+from keyword_extractor import Keyword_Extractor
+from reviewer_sampler import Reviewer_Sampler
+from venue_extractor import Gazetteer_Venue_Extractor, export_geograpy_gazetteer
+from instrumentation import record_rows
+
+
+NAME_VERSION = f"nameparser-{package_version('nameparser')}"
+VENUE_VERSION = f"geograpy3-{package_version('geograpy3')}"
+
+# Corpora geograpy needs, fetched by bootstrap into a project-local folder
+NLTK_DATA = 'cache/nltk_data'
+NLTK_RESOURCES = [
+    ('averaged_perceptron_tagger', 'taggers/averaged_perceptron_tagger'),
+    ('maxent_ne_chunker', 'chunkers/maxent_ne_chunker'),
+    ('words', 'corpora/words'),
+    ('treebank', 'corpora/treebank'),
+    ('maxent_treebank_pos_tagger', 'taggers/maxent_treebank_pos_tagger'),
+    ('punkt', 'tokenizers/punkt'),
+]
+
+
+def ensure_nltk_data(download=True):
+    # Only missing corpora are downloaded, so a bootstrapped checkout never
+    # touches the network
+    import nltk
+    path = os.path.abspath(NLTK_DATA)
+    if path not in nltk.data.path:
+        nltk.data.path.insert(0, path)
+    for name, resource in NLTK_RESOURCES:
+        try:
+            nltk.data.find(resource)
+        except LookupError:
+            if not download:
+                raise
+            nltk.downloader.download(name, download_dir=path, quiet=True)
+
+
+def bootstrap(gazetteer_path='input/cities.txt'):
+    # One-time download of every model the parse stages use
+    print('Caching NLTK corpora...')
+    ensure_nltk_data()
+    print('Caching the spaCy model...')
+    keyword_extractor.ensure_model()
+    # An existing gazetteer is kept, it may be a hand-curated one
+    if os.path.exists(gazetteer_path):
+        print(f'Keeping the gazetteer in {gazetteer_path}.')
+    else:
+        print('Exporting the geograpy gazetteer...')
+        os.makedirs(os.path.dirname(gazetteer_path) or '.', exist_ok=True)
+        cities = export_geograpy_gazetteer(gazetteer_path)
+        print(f'{cities} cities written to {gazetteer_path}.')
+    print('Models cached.')
 
 
 def generate_abstract(row):
@@ -21,11 +75,13 @@ def generate_textual_description(row):
 def is_corresponding(author):
     last_name = author.last_name.split()
     if last_name:
+        from gensim.utils import deaccent
         return deaccent(last_name[-1]) in deaccent(author.key)
     return False
 
 
 def extract_last_name(full_name):
+    from nameparser import HumanName
     full_name = re.sub(r'\d+', '', full_name)
     return HumanName(full_name).last
 
@@ -34,7 +90,29 @@ def remove_numbers_from_name(name):
     return re.sub(r'\d+', '', name)
 
 
+def drop_duplicates(df, subset, seen):
+    # Drop duplicates within the chunk and against every earlier chunk
+    df = df.drop_duplicates(subset, keep='first')
+    records = [hash(record) for record in zip(*(df[column] for column in subset))]
+    mask = [record not in seen for record in records]
+    seen.update(records)
+    return df[mask]
+
+
+def explode(df, column, name, key='key'):
+    # Flatten a column of lists into one (key, item) row per list item,
+    # rows without a list are dropped
+    lists = df[column]
+    lengths = lists.str.len().fillna(0).astype(int)
+    lists = lists[lengths > 0]
+    return pd.DataFrame({
+        key: np.repeat(df[key].values, lengths.values),
+        name: list(chain.from_iterable(lists.values)),
+    }, columns=[key, name])
+
+
 def extract_venue(title):
+    import geograpy
     places = geograpy.get_place_context(text=title).cities
     if places:
         return ','.join(places)
@@ -44,25 +122,40 @@ def extract_venue(title):
 
 class DBLP_Loader():
 
-    def __init__(self, *args, **kwargs):
-        nltk.downloader.download('averaged_perceptron_tagger', quiet=True)
-        nltk.downloader.download('maxent_ne_chunker', quiet=True)
-        nltk.downloader.download('words', quiet=True)
-        nltk.downloader.download('treebank', quiet=True)
-        nltk.downloader.download('maxent_treebank_pos_tagger', quiet=True)
-        nltk.downloader.download('punkt', quiet=True)
-
-        self.nlp = spacy.load('en')
+    def __init__(self, nrows=10000, chunksize=None, keyword_batch_size=1000,
+                 processes=1, seed=None, cache_path='cache/annotations.sqlite',
+                 venues='geograpy', gazetteer_path='input/cities.txt',
+                 state_path=None, *args, **kwargs):
+        self.keyword_extractor = Keyword_Extractor(
+            batch_size=keyword_batch_size, processes=processes)
+        # A state path switches the loader to incremental parsing
+        self.delta = Delta_State(state_path) if state_path else None
+        self.reader = DBLP_Reader(nrows=nrows, chunksize=chunksize,
+                                  delta=self.delta)
+        self.annotation_cache = Annotation_Cache(
+            cache_path) if cache_path else None
+        self.keyword_counts = Counter()
         self.all_keywords = []
         self.schools = []
+        self.venues = venues
+        self.gazetteer_path = gazetteer_path
+        self.venue_extractor = None
+        self.seed = seed
+        if seed is not None:
+            random.seed(seed)
         return super().__init__(*args, **kwargs)
 
-    def extract_keyword_from_title(self, title):
-        keywords = []
-        for token in self.nlp(title):
-            if token.pos_ == "NOUN":
-                keywords.append(token.lower_)
-        self.all_keywords.extend(keywords)
+    def annotate(self, annotator, version, extract, texts):
+        texts = list(texts)
+        if self.annotation_cache is None:
+            return extract(texts)
+        return self.annotation_cache.map(annotator, version, extract, texts)
+
+    def extract_keywords_from_titles(self, titles):
+        keywords = self.annotate('keywords', keyword_extractor.VERSION,
+                                 self.keyword_extractor.extract, titles)
+        for title_keywords in keywords:
+            self.keyword_counts.update(title_keywords)
         return keywords
 
     def randomize_keyword(self, keywords):
@@ -74,387 +167,319 @@ class DBLP_Loader():
         else:
             return keywords
 
-    def get_random_reviewers(self, authors, reviewers):
-        current_authors = set(authors)
-        filtered_reviewers = list(
-            filter(lambda x: x not in current_authors, reviewers))
-        return random.choices(filtered_reviewers, k=3)
+    def prepare_delta(self):
+        self.delta.prepare(self.reader, DELTA_SOURCES)
+
+    def reset_outputs(self, *paths):
+        for path in paths:
+            open(path, 'w').close()
+
+    def write_output(self, df, path):
+        # Every chunk is appended to the output started by reset_outputs
+        df.to_csv(path, sep=',', index=False, header=False, mode='a')
+        record_rows(rows_out=len(df))
+
+    def extract_venues(self, titles):
+        if self.venues == 'gazetteer':
+            if self.venue_extractor is None:
+                if not os.path.exists(self.gazetteer_path):
+                    raise FileNotFoundError(
+                        f'No gazetteer at {self.gazetteer_path}, run '
+                        'main.py --bootstrap to export the geograpy one')
+                self.venue_extractor = Gazetteer_Venue_Extractor(
+                    self.gazetteer_path)
+            return self.annotate('venue', self.venue_extractor.version,
+                                 self.venue_extractor.extract, titles)
+        return self.annotate('venue', VENUE_VERSION,
+                             self.extract_geograpy_venues, titles)
+
+    def extract_geograpy_venues(self, titles):
+        # Only titles missing from the annotation cache need the corpora
+        ensure_nltk_data()
+        return [extract_venue(title) for title in titles]
 
     def extract_conference_venues(self):
         print('Extracting conference venues...')
-        df = pd.read_csv('input/output_proceedings.csv',
-                         delimiter=';', nrows=10000)
-
-        # Drop columns with no value
-        df = df.dropna(axis=1, how='all')
-
-        # Extract useful columns
-        df = df[['booktitle', 'title']]
+        self.reset_outputs('output/conference_venues.csv')
+        seen = set()
+        for df in self.reader.chunks('proceedings'):
+            # Extract useful columns
+            df = df[['booktitle', 'title']]
 
-        # Drop duplicates of conference title
-        df = df.drop_duplicates(['booktitle'], keep='first')
+            # Drop duplicates of conference title
+            df = drop_duplicates(df, ['booktitle'], seen)
 
-        # Drop rows with any null value in defined columns
-        df = df.dropna(subset=['booktitle', 'title'])
+            # Drop rows with any null value in defined columns
+            df = df.dropna(subset=['booktitle', 'title'])
+            if df.empty:
+                continue
 
-        df['venue'] = df['title'].apply(extract_venue)
+            df['venue'] = self.extract_venues(df['title'])
 
-        # Drop rows with no venue information
-        df = df.dropna(subset=['venue'])
+            # Drop rows with no venue information
+            df = df.dropna(subset=['venue'])
 
-        df = df[['booktitle', 'venue']]
+            df = df[['booktitle', 'venue']]
 
-        df.to_csv('output/conference_venues.csv',
-                  sep=',', index=False, header=False)
+            self.write_output(df, 'output/conference_venues.csv')
         print('Conference venues extracted.')
 
     def extract_conferences(self):
         print('Extracting conferences...')
-        df = pd.read_csv('input/output_inproceedings.csv',
-                         delimiter=';', nrows=10000, error_bad_lines=False)
+        self.reset_outputs('output/proceedings.csv')
+        seen = set()
+        for df in self.reader.chunks('inproceedings'):
+            # Extract useful columns
+            df = df[['booktitle', 'year']]
 
-        # Drop columns with no value
-        df = df.dropna(axis=1, how='all')
+            # Drop rows with incomplete information
+            df = drop_duplicates(df, ['booktitle', 'year'], seen)
 
-        # Extract useful columns
-        df = df[['booktitle', 'year']]
+            # Ignoring rows with non-numerical value in year column
+            df['year'] = pd.to_numeric(df['year'], errors='coerce')
 
-        # Drop rows with incomplete information
-        df = df.drop_duplicates()
+            # Drop rows with any null value in defined columns
+            df = df.dropna(subset=['booktitle', 'year'])
 
-        # Ignoring rows with non-numerical value in year column
-        df['year'] = pd.to_numeric(df['year'], errors='coerce')
-
-        # Drop rows with any null value in defined columns
-        df = df.dropna(subset=['booktitle', 'year'])
-
-        df.to_csv('output/proceedings.csv',
-                  sep=',', index=False, header=False)
+            self.write_output(df, 'output/proceedings.csv')
         print('Conferences extracted.')
 
     def extract_journals(self):
         print('Extracting journals...')
-        df = pd.read_csv('input/output_article.csv',
-                         delimiter=';', nrows=10000, error_bad_lines=False)
-        df = df.dropna(axis=1, how='all')
-        df = df[['journal', 'year', 'volume', 'mdate']]
-
-        # Ignoring rows with non-numerical value in year column
-        df['year'] = pd.to_numeric(df['year'], errors='coerce')
-        df = df.sort_values(by=['mdate'], ascending=False, na_position='last')
-        df = df.drop_duplicates(['journal', 'year', 'volume'], keep='first')
-        df = df.drop('mdate', axis=1)
-
-        # Drop rows with any null value in defined columns
-        df = df.dropna(subset=['journal', 'year', 'volume'])
-
-        df.to_csv('output/journals.csv',
-                  sep=',', index=False, header=False)
+        self.reset_outputs('output/journals.csv')
+        seen = set()
+        for df in self.reader.chunks('article'):
+            df = df[['journal', 'year', 'volume', 'mdate']]
+
+            # Ignoring rows with non-numerical value in year column
+            df['year'] = pd.to_numeric(df['year'], errors='coerce')
+            df = df.sort_values(by=['mdate'], ascending=False,
+                                na_position='last')
+            df = drop_duplicates(df, ['journal', 'year', 'volume'], seen)
+            df = df.drop('mdate', axis=1)
+
+            # Drop rows with any null value in defined columns
+            df = df.dropna(subset=['journal', 'year', 'volume'])
+
+            self.write_output(df, 'output/journals.csv')
         print('Journals extracted.')
 
-    def extract_conference_papers(self):
-        print('Extracting conference papers...')
-        df = pd.read_csv('input/output_inproceedings.csv',
-                         delimiter=';', nrows=10000, error_bad_lines=False)
+    def extract_papers(self, source, columns, papers_path, keywords_path):
+        raw_keywords_path = keywords_path + '.raw'
+        self.reset_outputs(papers_path, raw_keywords_path)
+        self.keyword_counts = Counter()
 
-        # Drop columns with no value
-        df = df.dropna(axis=1, how='all')
+        # Keep the version of each (key, title) with the latest mdate
+        latest = self.reader.latest_rows(source, ['key', 'title'])
+        for df in self.reader.chunks(source):
+            df = df[df.index.isin(latest)]
 
-        # Extract useful columns
-        df = df[['key', 'title', 'booktitle', 'year', 'mdate']]
+            # Extract useful columns
+            df = df[columns]
 
-        df = df.sort_values(by=['mdate'], ascending=False, na_position='last')
-        df = df.drop_duplicates(['key', 'title'], keep='first')
-        df = df.drop('mdate', axis=1)
+            # Drop rows with any null value in defined columns
+            df = df.dropna(subset=columns)
+            if df.empty:
+                continue
 
-        # Drop rows with any null value in defined columns
-        df = df.dropna(subset=['key', 'title', 'booktitle', 'year'])
+            # Generate random abstract
+            df['abstract'] = df.apply(generate_abstract, axis=1)
+            self.write_output(df, papers_path)
 
-        # Generate random abstract
-        df['abstract'] = df.apply(generate_abstract, axis=1)
-
-        # Extract keywords
-        df['keywords'] = df['title'].apply(self.extract_keyword_from_title)
+            # Extract keywords, they are only randomized once the global top
+            # keywords are known
+            keywords = pd.Series(self.extract_keywords_from_titles(df['title']),
+                                 index=df.index)
+            df = df[['key']].assign(keywords=keywords.str.join('|'))
+            self.write_output(df, raw_keywords_path)
+        self.keyword_extractor.close()
 
         # Get top 20 keywords to fill in papers without any keyword
-        self.all_keywords = Counter(self.all_keywords)
-        self.all_keywords = self.all_keywords.most_common(20)
-        self.all_keywords = pd.DataFrame(self.all_keywords, columns=[
-            'keyword', 'occurence'])
-        self.all_keywords = self.all_keywords['keyword'].tolist()
-
-        # Randomize kwyword insertion to papers without any keyword
-        df['keywords'] = df['keywords'].apply(self.randomize_keyword)
-        df_keywords = df.set_index(['key']).keywords.apply(pd.Series).stack(
-        ).reset_index(name='keyword').drop('level_1', axis=1)
-        df = df.drop('keywords', axis=1)
-
-        df.to_csv('output/conference_papers.csv',
-                  sep=',', index=False, header=False)
-        df_keywords.to_csv('output/conference_paper_keywords.csv',
-                           sep=',', index=False, header=False)
-        print('Conference papers extracted.')
-
-    def extract_journal_papers(self):
-        print('Extracting journal papers...')
-        df = pd.read_csv('input/output_article.csv',
-                         delimiter=';', nrows=10000, error_bad_lines=False)
-
-        # Drop columns with no value
-        df = df.dropna(axis=1, how='all')
-
-        # Extract useful columns
-        df = df[['key', 'title', 'journal', 'year', 'volume', 'mdate']]
+        self.all_keywords = [keyword for keyword,
+                             _ in self.keyword_counts.most_common(20)]
 
-        df = df.sort_values(by=['mdate'], ascending=False, na_position='last')
-        df = df.drop_duplicates(['key', 'title'], keep='first')
-        df = df.drop('mdate', axis=1)
+        self.reset_outputs(keywords_path)
+        for df in self.reader.output_chunks(raw_keywords_path,
+                                            names=['key', 'keywords'],
+                                            dtype=str, keep_default_na=False):
+            df['keywords'] = df['keywords'].apply(
+                lambda keywords: [k for k in keywords.split('|') if k])
 
-        # Drop rows with any null value in defined columns
-        df = df.dropna(subset=['key', 'title', 'journal', 'year', 'volume'])
+            # Randomize keyword insertion to papers without any keyword
+            df['keywords'] = df['keywords'].apply(self.randomize_keyword)
+            df = explode(df, 'keywords', 'keyword')
 
-        # Generate random abstract
-        df['abstract'] = df.apply(generate_abstract, axis=1)
+            self.write_output(df, keywords_path)
+        os.remove(raw_keywords_path)
 
-        # Extract keywords
-        df['keywords'] = df['title'].apply(self.extract_keyword_from_title)
+    def extract_conference_papers(self):
+        print('Extracting conference papers...')
+        self.extract_papers('inproceedings',
+                            ['key', 'title', 'booktitle', 'year'],
+                            'output/conference_papers.csv',
+                            'output/conference_paper_keywords.csv')
+        print('Conference papers extracted.')
 
-        # Get top 20 keywords to fill in papers without any keyword
-        self.all_keywords = Counter(self.all_keywords)
-        self.all_keywords = self.all_keywords.most_common(20)
-        self.all_keywords = pd.DataFrame(self.all_keywords, columns=[
-            'keyword', 'occurence'])
-        self.all_keywords = self.all_keywords['keyword'].tolist()
-
-        # Randomize kwyword insertion to papers without any keyword
-        df['keywords'] = df['keywords'].apply(self.randomize_keyword)
-        df_keywords = df.set_index(['key']).keywords.apply(pd.Series).stack(
-        ).reset_index(name='keyword').drop('level_1', axis=1)
-
-        df = df.drop('keywords', axis=1)
-
-        df.to_csv('output/journal_papers.csv',
-                  sep=',', index=False, header=False)
-        df_keywords.to_csv('output/journal_paper_keywords.csv',
-                           sep=',', index=False, header=False)
+    def extract_journal_papers(self):
+        print('Extracting journal papers...')
+        self.extract_papers('article',
+                            ['key', 'title', 'journal', 'year', 'volume'],
+                            'output/journal_papers.csv',
+                            'output/journal_paper_keywords.csv')
         print('Journal papers extracted.')
 
+    def extract_authors(self, source, corresponding_path,
+                        non_corresponding_path, authors_path=None):
+        self.reset_outputs(*filter(None, [corresponding_path,
+                                          non_corresponding_path,
+                                          authors_path]))
+        seen_authors = set()
+        seen_corresponding = set()
+        seen_non_corresponding = set()
+        for df in self.reader.chunks(source):
+            df = df.dropna(subset=['author'])
+
+            # Extract useful columns
+            df = df[['author', 'key']]
+            df = drop_duplicates(df, ['author', 'key'], seen_authors)
+            if df.empty:
+                continue
+
+            df['author'] = df['author'].str.split('|')
+
+            df = explode(df, 'author', 'author')
+
+            df['author'] = df['author'].apply(remove_numbers_from_name)
+            df['last_name'] = self.annotate(
+                'last_name', NAME_VERSION,
+                lambda names: [extract_last_name(name) for name in names],
+                df['author'])
+            df['is_corresponding'] = df.apply(is_corresponding, axis=1)
+
+            df_corresponding = df[df['is_corresponding'] == True]
+            df_non_corresponding = df[df['is_corresponding'] == False]
+
+            # Extract useful columns
+            df_corresponding = df_corresponding[['key', 'author']]
+            df_non_corresponding = df_non_corresponding[['key', 'author']]
+
+            # Drop duplicates
+            df_corresponding = drop_duplicates(
+                df_corresponding, ['key'], seen_corresponding)
+            df_non_corresponding = drop_duplicates(
+                df_non_corresponding, ['key', 'author'], seen_non_corresponding)
+
+            self.write_output(df_corresponding, corresponding_path)
+            self.write_output(df_non_corresponding, non_corresponding_path)
+            if authors_path:
+                self.write_output(df, authors_path)
+
     def extract_conference_authors(self):
         print('Extracting authors from conference papers...')
-        df = pd.read_csv('input/output_inproceedings.csv',
-                         delimiter=';', nrows=10000,
-                         error_bad_lines=False)
-
-        # Drop columns with no value
-        df = df.dropna(axis=1, how='all')
-
-        # Extract useful columns
-        df = df[['author', 'key']]
-        df = df.drop_duplicates()
-
-        df['author'] = df['author'].str.split('|')
-
-        df = df.set_index(['key']).author.apply(pd.Series).stack(
-        ).reset_index(name='author').drop('level_1', axis=1)
-
-        df['author'] = df['author'].apply(remove_numbers_from_name)
-        df['last_name'] = df['author'].apply(extract_last_name)
-        df['is_corresponding'] = df.apply(is_corresponding, axis=1)
-
-        df_corresponding = df[df['is_corresponding'] == True]
-        df_non_corresponding = df[df['is_corresponding'] == False]
-
-        # Extract useful columns
-        df_corresponding = df_corresponding[['key', 'author']]
-        df_non_corresponding = df_non_corresponding[['key', 'author']]
-
-        # Drop duplicates
-        df_corresponding = df_corresponding.drop_duplicates(
-            ['key'], keep='first')
-        df_non_corresponding = df_non_corresponding.drop_duplicates(
-            ['key', 'author'], keep='first')
-
-        df_corresponding.to_csv('output/corresponding_conference_authors.csv',
-                                sep=',', index=False, header=False)
-        df_non_corresponding.to_csv('output/non_corresponding_conference_authors.csv',
-                                    sep=',', index=False, header=False)
+        self.extract_authors('inproceedings',
+                             'output/corresponding_conference_authors.csv',
+                             'output/non_corresponding_conference_authors.csv')
         print('Authors from conference papers extracted.')
 
     def extract_journal_authors(self):
         print('Extracting authors from journal papers...')
-        df = pd.read_csv('input/output_article.csv',
-                         delimiter=';', nrows=10000,
-                         error_bad_lines=False)
-
-        # Drop columns with no value
-        df = df.dropna(axis=1, how='all')
-
-        # Extract useful columns
-        df = df[['author', 'key']]
-        df = df.drop_duplicates()
-
-        df['author'] = df['author'].str.split('|')
-
-        df = df.set_index(['key']).author.apply(pd.Series).stack(
-        ).reset_index(name='author').drop('level_1', axis=1)
-
-        df['author'] = df['author'].apply(remove_numbers_from_name)
-        df['last_name'] = df['author'].apply(extract_last_name)
-        df['is_corresponding'] = df.apply(is_corresponding, axis=1)
-
-        df_corresponding = df[df['is_corresponding'] == True]
-        df_non_corresponding = df[df['is_corresponding'] == False]
-
-        # Extract useful columns
-        df_corresponding = df_corresponding[['key', 'author']]
-        df_non_corresponding = df_non_corresponding[['key', 'author']]
-
-        # Drop duplicates
-        df_corresponding = df_corresponding.drop_duplicates(
-            ['key'], keep='first')
-        df_non_corresponding = df_non_corresponding.drop_duplicates(
-            ['key', 'author'], keep='first')
-
-        df_corresponding.to_csv('output/corresponding_journal_authors.csv',
-                                sep=',', index=False, header=False)
-        df_non_corresponding.to_csv('output/non_corresponding_journal_authors.csv',
-                                    sep=',', index=False, header=False)
-
-        df.to_csv('output/journal_authors.csv',
-                  sep=',', index=False, header=False)
+        self.extract_authors('article',
+                             'output/corresponding_journal_authors.csv',
+                             'output/non_corresponding_journal_authors.csv',
+                             'output/journal_authors.csv')
         print('Authors from journal papers extracted.')
 
     def extract_schools(self):
         print('Extracting schools...')
-        df = pd.read_csv('input/output_school.csv', delimiter=';', nrows=10000,
-                         usecols={'school:string'},
-                         dtype={'school:string': str})
-        df = df.drop_duplicates(['school:string'])
+        self.reset_outputs('output/schools.csv')
+        seen = set()
+        for df in self.reader.chunks('school'):
+            df = drop_duplicates(df, ['school:string'], seen)
 
-        df.to_csv('output/schools.csv',
-                  sep=',', index=False, header=False)
+            self.write_output(df, 'output/schools.csv')
         print('Schools extracted.')
 
     def generate_random_author_schools(self):
         print("Generating random author's schools")
 
-        df_corresponding_conference_authors = pd.read_csv(
-            'output/corresponding_conference_authors.csv', header=None, delimiter=',', nrows=10000)
-        df_corresponding_conference_authors = df_corresponding_conference_authors[[
-            1]]
-        df_corresponding_conference_authors['author'] = df_corresponding_conference_authors[1]
-        df_corresponding_conference_authors = df_corresponding_conference_authors['author']
-
-        df_corresponding_journal_authors = pd.read_csv(
-            'output/corresponding_journal_authors.csv', header=None, delimiter=',', nrows=10000)
-        df_corresponding_journal_authors = df_corresponding_journal_authors[[
-            1]]
-        df_corresponding_journal_authors['author'] = df_corresponding_journal_authors[1]
-        df_corresponding_journal_authors = df_corresponding_journal_authors['author']
-
-        df_non_corresponding_conference_authors = pd.read_csv(
-            'output/non_corresponding_conference_authors.csv', header=None, delimiter=',', nrows=10000)
-        df_non_corresponding_conference_authors = df_non_corresponding_conference_authors[[
-            1]]
-        df_non_corresponding_conference_authors['author'] = df_non_corresponding_conference_authors[1]
-        df_non_corresponding_conference_authors = df_non_corresponding_conference_authors[
-            'author']
-
-        df_non_corresponding_journal_authors = pd.read_csv(
-            'output/non_corresponding_journal_authors.csv', header=None, delimiter=',', nrows=10000)
-        df_non_corresponding_journal_authors = df_non_corresponding_journal_authors[[
-            1]]
-        df_non_corresponding_journal_authors['author'] = df_non_corresponding_journal_authors[1]
-        df_non_corresponding_journal_authors = df_non_corresponding_journal_authors['author']
-
-        df = pd.concat([df_corresponding_conference_authors, df_corresponding_journal_authors,
-                        df_non_corresponding_conference_authors, df_non_corresponding_journal_authors])
-        df = df.drop_duplicates(0)
-        df = pd.DataFrame(df)
-
-        df_schools = pd.read_csv('input/output_school.csv', delimiter=';', nrows=10000,
-                                 usecols={'school:string'},
-                                 dtype={'school:string': str})
-
+        df_schools = self.reader.read('school')
         df_schools = df_schools.drop_duplicates(['school:string'])
         self.schools = df_schools['school:string'].tolist()
-        df['school'] = df['author'].apply(
-            lambda author: random.choice(self.schools))
 
-        df.to_csv('output/author_schools.csv',
-                  sep=',', index=False, header=False)
+        self.reset_outputs('output/author_schools.csv')
+        seen = set()
+        for path in ['output/corresponding_conference_authors.csv',
+                     'output/corresponding_journal_authors.csv',
+                     'output/non_corresponding_conference_authors.csv',
+                     'output/non_corresponding_journal_authors.csv']:
+            for df in self.reader.output_chunks(path, usecols=[1],
+                                                names=['key', 'author']):
+                df = drop_duplicates(df, ['author'], seen)
+                df['school'] = df['author'].apply(
+                    lambda author: random.choice(self.schools))
+
+                self.write_output(df, 'output/author_schools.csv')
         print("Author's affiliations generated.")
 
-    def generate_random_conference_reviewers(self):
-        print("Generating random conference's reviewers")
-        df = pd.read_csv('input/output_inproceedings.csv',
-                         delimiter=';', nrows=10000, error_bad_lines=False)
-
-        # Drop columns with no value
-        df = df.dropna(axis=1, how='all')
+    def paper_author_chunks(self, source, delta=True):
+        seen = set()
+        for df in self.reader.chunks(source, delta):
+            df = df.dropna(subset=['author'])
 
-        df = df.dropna(subset=['author'])
+            df_authors = df[['author', 'key']]
+            df_authors = drop_duplicates(df_authors, ['author', 'key'], seen)
+            if df_authors.empty:
+                continue
 
-        df_authors = df[['author', 'key']]
-        df_authors = df_authors.drop_duplicates()
+            df_authors['author'] = df_authors['author'].str.split('|')
+            yield df_authors
 
-        df_authors['author'] = df_authors['author'].str.split('|')
+    def generate_random_reviewers(self, source, reviewers_path):
+        self.reset_outputs(reviewers_path)
 
-        df_authors_all = df_authors.set_index(['key']).author.apply(
-            pd.Series).stack().reset_index(name='author').drop('level_1', axis=1)
-        df_authors_all['author'] = df_authors_all['author'].apply(
-            remove_numbers_from_name)
+        # Reviewers are drawn from the authors of every chunk, so the
+        # population is collected before any paper is assigned
+        authors = []
+        # Incremental runs still draw from every author, not only the delta's
+        for df_authors in self.paper_author_chunks(source, delta=False):
+            df_authors_all = explode(df_authors, 'author', 'author')
+            authors.extend(
+                df_authors_all['author'].apply(remove_numbers_from_name))
 
-        authors = df_authors_all['author'].tolist()
+        sampler = Reviewer_Sampler(authors, seed=self.seed)
 
-        df_authors['reviewer'] = df_authors['author'].apply(
-            lambda author: self.get_random_reviewers(author, authors))
-        df_authors = df_authors.set_index(['key']).reviewer.apply(
-            pd.Series).stack().reset_index(name='reviewer').drop('level_1', axis=1)
-        df_authors['reviewer'] = df_authors['reviewer'].apply(
-            remove_numbers_from_name)
+        for df_authors in self.paper_author_chunks(source):
+            df_authors['reviewer'] = df_authors['author'].apply(
+                lambda author: sampler.sample(
+                    [remove_numbers_from_name(name) for name in author]))
+            df_authors = explode(df_authors, 'reviewer', 'reviewer')
+            df_authors['reviewer'] = df_authors['reviewer'].apply(
+                remove_numbers_from_name)
 
-        df_authors['textual_description'] = df_authors.apply(
-            generate_textual_description, axis=1)
+            df_authors['textual_description'] = df_authors.apply(
+                generate_textual_description, axis=1)
 
-        df_authors.to_csv('output/conference_paper_reviewers.csv',
-                          sep=',', index=False, header=False)
+            self.write_output(df_authors, reviewers_path)
 
+    def generate_random_conference_reviewers(self):
+        print("Generating random conference's reviewers")
+        self.generate_random_reviewers('inproceedings',
+                                       'output/conference_paper_reviewers.csv')
         print("Conference's reviewers generated.")
 
     def generate_random_journal_reviewers(self):
         print("Generating random journal's reviewers")
-        df = pd.read_csv('input/output_article.csv',
-                         delimiter=';', nrows=10000, error_bad_lines=False)
-
-        # Drop columns with no value
-        df = df.dropna(axis=1, how='all')
-
-        df = df.dropna(subset=['author'])
-
-        df_authors = df[['author', 'key']]
-        df_authors = df_authors.drop_duplicates()
-
-        df_authors['author'] = df_authors['author'].str.split('|')
-
-        df_authors_all = df_authors.set_index(['key']).author.apply(
-            pd.Series).stack().reset_index(name='author').drop('level_1', axis=1)
-        df_authors_all['author'] = df_authors_all['author'].apply(
-            remove_numbers_from_name)
-
-        authors = df_authors_all['author'].tolist()
+        self.generate_random_reviewers('article',
+                                       'output/journal_paper_reviewers.csv')
+        print("Journal's reviewers generated.")
 
-        df_authors['reviewer'] = df_authors['author'].apply(
-            lambda author: self.get_random_reviewers(author, authors))
-        df_authors = df_authors.set_index(['key']).reviewer.apply(
-            pd.Series).stack().reset_index(name='reviewer').drop('level_1', axis=1)
-        df_authors['reviewer'] = df_authors['reviewer'].apply(
-            remove_numbers_from_name)
 
-        df_authors['textual_description'] = df_authors.apply(
-            generate_textual_description, axis=1)
+loaders = {}
 
-        df_authors.to_csv('output/journal_paper_reviewers.csv',
-                          sep=',', index=False, header=False)
 
-        print("Journal's reviewers generated.")
+def run_stage(options, stage):
+    # Pool workers build one loader per process and reuse it across stages
+    key = tuple(sorted(options.items()))
+    if key not in loaders:
+        loaders[key] = DBLP_Loader(**options)
+    getattr(loaders[key], stage)()
@@ -0,0 +1,120 @@
+import os
+import pandas as pd
+from instrumentation import record_rows
+
+
+INPUT_FILES = {
+    'inproceedings': 'input/output_inproceedings.csv',
+    'article': 'input/output_article.csv',
+    'proceedings': 'input/output_proceedings.csv',
+    'school': 'input/output_school.csv',
+}
+
+# Only the columns used by the extract_* and generate_* stages are parsed
+INPUT_COLUMNS = {
+    'inproceedings': ['key', 'mdate', 'author', 'title', 'booktitle', 'year'],
+    'article': ['key', 'mdate', 'author', 'title', 'journal', 'year', 'volume'],
+    'proceedings': ['booktitle', 'title'],
+    'school': ['school:string'],
+}
+
+# Sources whose records are tracked for incremental parsing
+DELTA_SOURCES = ['inproceedings', 'article']
+
+INPUT_DTYPES = {
+    'school': {'school:string': str},
+}
+
+
+class DBLP_Reader():
+
+    def __init__(self, nrows=10000, chunksize=None, delta=None, *args, **kwargs):
+        # Streaming mode reads the whole file in chunks, so the row cap only
+        # applies to the in-memory mode
+        self.chunksize = chunksize
+        self.nrows = nrows if chunksize is None else None
+        self.delta = delta
+        self.frames = {}
+        return super().__init__(*args, **kwargs)
+
+    def read_csv(self, source, **kwargs):
+        options = {
+            'delimiter': ';',
+            'error_bad_lines': False,
+            'usecols': INPUT_COLUMNS[source],
+            'dtype': INPUT_DTYPES.get(source),
+        }
+        options.update(kwargs)
+        return pd.read_csv(INPUT_FILES[source], **options)
+
+    def read(self, source):
+        # Each source file is parsed once and shared by every stage
+        if source not in self.frames:
+            print(f'Reading {INPUT_FILES[source]}...')
+            self.frames[source] = self.only_delta(
+                source, self.read_csv(source, nrows=self.nrows))
+        return self.frames[source]
+
+    def only_delta(self, source, df):
+        # In incremental mode only new or changed records reach the stages
+        if self.delta is None or source not in DELTA_SOURCES:
+            return df
+        return df[df['key'].isin(self.delta.pending_keys(source))]
+
+    def chunks(self, source, delta=True):
+        if not delta and self.delta is not None:
+            # Every record, e.g. for populations sampled from in a delta run
+            yield from self.all_chunks(source)
+            return
+        if self.chunksize is None:
+            df = self.read(source)
+            record_rows(rows_in=len(df))
+            yield df
+            return
+        for chunk in self.read_csv(source, chunksize=self.chunksize):
+            chunk = self.only_delta(source, chunk)
+            record_rows(rows_in=len(chunk))
+            yield chunk
+
+    def all_chunks(self, source):
+        if self.chunksize is None:
+            df = self.read_csv(source, nrows=self.nrows)
+            record_rows(rows_in=len(df))
+            yield df
+            return
+        for chunk in self.read_csv(source, chunksize=self.chunksize):
+            record_rows(rows_in=len(chunk))
+            yield chunk
+
+    def output_chunks(self, path, **kwargs):
+        if os.path.getsize(path) == 0:
+            return
+        if self.chunksize is None:
+            df = pd.read_csv(path, header=None, nrows=self.nrows, **kwargs)
+            record_rows(rows_in=len(df))
+            yield df
+            return
+        for chunk in pd.read_csv(path, header=None, chunksize=self.chunksize, **kwargs):
+            record_rows(rows_in=len(chunk))
+            yield chunk
+
+    def latest_rows(self, source, subset):
+        # Index labels of the rows kept by drop_duplicates(subset) when the
+        # row with the latest mdate wins
+        if self.chunksize is None:
+            df = self.read(source)
+            df = df.sort_values(by=['mdate'], ascending=False,
+                                na_position='last')
+            return set(df.drop_duplicates(subset, keep='first').index)
+
+        # Streaming mode keeps one hashed entry per record instead of the rows
+        latest = {}
+        for chunk in self.read_csv(source, usecols=subset + ['mdate'],
+                                   chunksize=self.chunksize):
+            records = zip(*(chunk[column] for column in subset))
+            mdates = chunk['mdate'].fillna('').astype(str)
+            for row, record, mdate in zip(chunk.index, records, mdates):
+                record = hash(record)
+                if record not in latest or mdate > latest[record][0]:
+                    latest[record] = (mdate, row)
+        return set(row for _, row in latest.values())
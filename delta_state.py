@@ -0,0 +1,102 @@
+import csv
+from sqlite_store import SQLite_Store
+
+
+class Delta_State(SQLite_Store):
+
+    schema = [
+        """
+        CREATE TABLE IF NOT EXISTS records (
+            source TEXT, key TEXT, mdate TEXT, PRIMARY KEY (source, key))
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS pending (
+            source TEXT, key TEXT, mdate TEXT, status TEXT,
+            PRIMARY KEY (source, key))
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS high_water (
+            source TEXT PRIMARY KEY, mdate TEXT)
+        """,
+    ]
+
+    def __init__(self, path='cache/dblp_state.sqlite', batch_size=500,
+                 *args, **kwargs):
+        self.batch_size = batch_size
+        self.pending = {}
+        return super().__init__(path, *args, **kwargs)
+
+    def high_water(self, source):
+        row = self.connect().execute(
+            'SELECT mdate FROM high_water WHERE source = ?', (source,)).fetchone()
+        return row[0] if row else ''
+
+    def known_mdates(self, source, keys):
+        connection = self.connect()
+        mdates = {}
+        for i in range(0, len(keys), self.batch_size):
+            batch = keys[i:i + self.batch_size]
+            placeholders = ','.join('?' * len(batch))
+            mdates.update(connection.execute(
+                f'SELECT key, mdate FROM records WHERE source = ? AND key IN ({placeholders})',
+                [source] + batch))
+        return mdates
+
+    def prepare(self, reader, sources, delta_path='output/delta_papers.csv'):
+        # Find the records that are new or carry a newer mdate than the
+        # last loaded run, only those are parsed and loaded. A delta that was
+        # parsed but never loaded is still newer, so it is found again.
+        connection = self.connect()
+        with connection:
+            connection.execute('DELETE FROM pending')
+
+        with open(delta_path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            for source in sources:
+                print(f'Finding {source} records changed since {self.high_water(source) or "the first run"}...')
+                pending = {}
+                for chunk in reader.read_csv(source, usecols=['key', 'mdate'],
+                                             chunksize=reader.chunksize or 100000,
+                                             nrows=reader.nrows):
+                    chunk = chunk.dropna(subset=['key'])
+                    keys = chunk['key'].astype(str).tolist()
+                    mdates = chunk['mdate'].fillna('').astype(str).tolist()
+                    known = self.known_mdates(source, keys)
+                    for key, mdate in zip(keys, mdates):
+                        if key not in known:
+                            status = 'new'
+                        elif mdate > known[key]:
+                            status = 'changed'
+                        else:
+                            continue
+                        if key not in pending or mdate > pending[key][0]:
+                            pending[key] = (mdate, status)
+
+                with connection:
+                    connection.executemany('INSERT INTO pending VALUES (?, ?, ?, ?)',
+                                           [(source, key, mdate, status)
+                                            for key, (mdate, status) in pending.items()])
+                writer.writerows([key, status]
+                                 for key, (_, status) in pending.items())
+                print(f'{len(pending)} {source} records to update.')
+
+    def pending_keys(self, source):
+        if source not in self.pending:
+            self.pending[source] = set(key for key, in self.connect().execute(
+                'SELECT key FROM pending WHERE source = ?', (source,)))
+        return self.pending[source]
+
+    def commit(self):
+        # Only called once the delta was loaded successfully
+        connection = self.connect()
+        with connection:
+            connection.execute("""
+                INSERT OR REPLACE INTO records
+                SELECT source, key, mdate FROM pending
+            """)
+            connection.execute("""
+                INSERT OR REPLACE INTO high_water
+                SELECT source, MAX(mdate) FROM records GROUP BY source
+            """)
+            connection.execute('DELETE FROM pending')
+        self.pending = {}
@@ -0,0 +1,102 @@
+import os
+import sys
+import json
+import time
+import resource
+import threading
+import tracemalloc
+from functools import partial
+
+
+# Result summary counters kept for Neo4j stages
+COUNTERS = ['nodes_created', 'nodes_deleted', 'relationships_created',
+            'relationships_deleted', 'properties_set', 'labels_added']
+
+# The stage running on this thread, loaders add their rows and counters to it
+current = threading.local()
+
+
+def peak_rss():
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss if sys.platform == 'darwin' else rss * 1024
+
+
+def record_rows(rows_in=0, rows_out=0):
+    stage = getattr(current, 'stage', None)
+    if stage is not None:
+        stage['rows_in'] += rows_in
+        stage['rows_out'] += rows_out
+
+
+def record_counters(summary):
+    stage = getattr(current, 'stage', None)
+    if stage is not None and summary is not None:
+        for counter in COUNTERS:
+            stage[counter] += getattr(summary.counters, counter, 0)
+
+
+def measure_stage(name, function, trace_memory=False):
+    # Runs in the thread or process that executes the stage, the record is
+    # returned to the caller which writes it to the report
+    stage = dict({'stage': name, 'pid': os.getpid(), 'rows_in': 0,
+                  'rows_out': 0}, **{counter: 0 for counter in COUNTERS})
+    current.stage = stage
+    rss = peak_rss()
+    # Traced peaks cover the whole process, only for stages run one at a time
+    tracing = trace_memory and not tracemalloc.is_tracing()
+    if tracing:
+        tracemalloc.start()
+    wall, cpu = time.perf_counter(), time.thread_time()
+    try:
+        function()
+    finally:
+        current.stage = None
+        if tracing:
+            stage['peak_traced'] = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+    stage['wall'] = time.perf_counter() - wall
+    stage['cpu'] = time.thread_time() - cpu
+    # The high-water mark of the process, which pool workers carry over from
+    # earlier stages, and how far this stage raised it
+    stage['peak_rss'] = peak_rss()
+    stage['rss_growth'] = stage['peak_rss'] - rss
+    return stage
+
+
+class Run_Report():
+
+    def __init__(self, path=None, progress=False, *args, **kwargs):
+        self.path = path
+        self.progress = progress
+        self.run_id = time.strftime('%Y-%m-%dT%H:%M:%S')
+        self.lock = threading.Lock()
+        return super().__init__(*args, **kwargs)
+
+    def wrap(self, name, function):
+        return partial(measure_stage, name, function)
+
+    def start(self, name):
+        if self.progress:
+            print(f'[{self.run_id}] {name} started', file=sys.stderr)
+
+    def finish(self, record):
+        record = dict(record, run=self.run_id)
+        with self.lock:
+            if self.path:
+                directory = os.path.dirname(self.path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                with open(self.path, 'a') as f:
+                    f.write(json.dumps(record) + '\n')
+        if self.progress:
+            print(f"[{self.run_id}] {record['stage']} finished in "
+                  f"{record['wall']:.1f}s, {record['rows_in']} rows in, "
+                  f"{record['rows_out']} rows out, "
+                  f"peak RSS {record['peak_rss'] // 2 ** 20} MB "
+                  f"(+{record['rss_growth'] // 2 ** 20} MB)", file=sys.stderr)
+
+    def run(self, name, function):
+        # For stages called outside a scheduler
+        self.start(name)
+        self.finish(measure_stage(name, function))
@@ -0,0 +1,73 @@
+import multiprocessing
+from annotation_cache import package_version
+
+
+# Keywords only need POS tags, so the parser and NER are never loaded
+DISABLED_COMPONENTS = ['parser', 'ner']
+
+# Cached keywords are invalidated whenever spaCy or the model changes
+VERSION = f"spacy-{package_version('spacy')}-{package_version('en_core_web_sm')}-nouns"
+
+worker_nlp = None
+
+
+def load_model():
+    # spaCy is only imported once keywords are actually extracted
+    import spacy
+    return spacy.load('en', disable=DISABLED_COMPONENTS)
+
+
+def ensure_model():
+    # Installs and links the 'en' model when it is missing
+    try:
+        load_model()
+    except OSError:
+        from spacy.cli import download
+        download('en')
+
+
+def extract_nouns(doc):
+    return [token.lower_ for token in doc if token.pos_ == "NOUN"]
+
+
+def init_worker():
+    global worker_nlp
+    worker_nlp = load_model()
+
+
+def extract_batch(titles):
+    return [extract_nouns(doc) for doc in worker_nlp.pipe(titles, batch_size=len(titles))]
+
+
+class Keyword_Extractor():
+
+    def __init__(self, batch_size=1000, processes=1, *args, **kwargs):
+        self.batch_size = batch_size
+        self.processes = processes
+        self.nlp = None
+        self.pool = None
+        return super().__init__(*args, **kwargs)
+
+    def extract(self, titles):
+        titles = [str(title) for title in titles]
+        if self.processes <= 1:
+            if self.nlp is None:
+                self.nlp = load_model()
+            return [extract_nouns(doc) for doc in self.nlp.pipe(titles, batch_size=self.batch_size)]
+
+        # Each worker loads its own model once, batches keep their order
+        if self.pool is None:
+            self.pool = multiprocessing.Pool(self.processes,
+                                             initializer=init_worker)
+        batches = [titles[i:i + self.batch_size]
+                   for i in range(0, len(titles), self.batch_size)]
+        keywords = []
+        for batch in self.pool.imap(extract_batch, batches):
+            keywords.extend(batch)
+        return keywords
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.close()
+            self.pool.join()
+            self.pool = None
@@ -1,81 +1,284 @@
 from dotenv import load_dotenv
 import argparse
-from neo4j_loader import Neo4J_Loader
-from dblp_loader import DBLP_Loader
-from query_runner import Query_Runner
+import json
+import sys
+from functools import partial
+from query_runner import Query_Runner, read_keyword_sets
+from stage_scheduler import Stage_Scheduler
+from result_cache import Result_Cache
+from instrumentation import Run_Report
+from plan_capture import Plan_Capture
+
+# The loaders pull in pandas, spaCy, geograpy, nltk and gensim, so they are
+# only imported by the branches that use them
 
 load_dotenv()
 
+INPROCEEDINGS = 'input/output_inproceedings.csv'
+ARTICLE = 'input/output_article.csv'
+PROCEEDINGS = 'input/output_proceedings.csv'
+SCHOOL = 'input/output_school.csv'
+
+# Stage name, files read, files written
+PARSE_STAGES = [
+    ('extract_conferences', [INPROCEEDINGS], ['proceedings.csv']),
+    ('extract_journals', [ARTICLE], ['journals.csv']),
+    ('extract_conference_venues', [PROCEEDINGS], ['conference_venues.csv']),
+    ('extract_conference_papers', [INPROCEEDINGS],
+     ['conference_papers.csv', 'conference_paper_keywords.csv']),
+    ('extract_journal_papers', [ARTICLE],
+     ['journal_papers.csv', 'journal_paper_keywords.csv']),
+    ('extract_conference_authors', [INPROCEEDINGS],
+     ['corresponding_conference_authors.csv',
+      'non_corresponding_conference_authors.csv']),
+    ('extract_journal_authors', [ARTICLE],
+     ['corresponding_journal_authors.csv',
+      'non_corresponding_journal_authors.csv', 'journal_authors.csv']),
+    ('generate_random_conference_reviewers', [INPROCEEDINGS],
+     ['conference_paper_reviewers.csv']),
+    ('generate_random_journal_reviewers', [ARTICLE],
+     ['journal_paper_reviewers.csv']),
+]
+
+# Organizations and affiliations, a bulk import writes them at parse time
+# since it cannot load them afterwards
+SCHOOL_STAGES = [
+    ('extract_schools', [SCHOOL], ['schools.csv']),
+    ('generate_random_author_schools',
+     [SCHOOL, 'corresponding_conference_authors.csv',
+      'corresponding_journal_authors.csv',
+      'non_corresponding_conference_authors.csv',
+      'non_corresponding_journal_authors.csv'], ['author_schools.csv']),
+]
+
+# Stage name, graph elements read, graph elements written. A stage writes
+# every node it locks, i.e. the nodes it sets and both ends of the
+# relationships it MERGEs or deletes, so stages locking the same nodes never
+# run concurrently. Conference and journal papers are disjoint node sets.
+LOAD_STAGES = [
+    ('load_conferences', [], ['Conference', 'Paper:conference']),
+    ('load_journals', [], ['Journal', 'Paper:journal']),
+    ('load_conference_venues', ['Conference'], ['Conference']),
+    ('delete_papers', [], ['Paper:conference', 'Paper:journal', 'Conference',
+                           'Journal', 'Keyword', 'Author']),
+    ('load_conference_papers', ['Conference'],
+     ['Paper:conference', 'Conference']),
+    ('load_journal_papers', ['Journal'], ['Paper:journal', 'Journal']),
+    ('load_conference_paper_keywords', ['Paper:conference'],
+     ['Paper:conference', 'Keyword', 'Conference']),
+    ('load_journal_paper_keywords', ['Paper:journal'],
+     ['Paper:journal', 'Keyword', 'Journal']),
+    ('load_corresponding_conference_authors', ['Paper:conference'],
+     ['Paper:conference', 'Author']),
+    ('load_corresponding_journal_authors', ['Paper:journal'],
+     ['Paper:journal', 'Author']),
+    ('load_non_corresponding_conference_authors', ['Paper:conference'],
+     ['Paper:conference', 'Author']),
+    ('load_non_corresponding_journal_authors', ['Paper:journal'],
+     ['Paper:journal', 'Author']),
+    ('generate_random_citations', ['Paper:conference', 'Paper:journal'],
+     ['Paper:conference', 'Paper:journal']),
+    ('load_initial_conference_paper_reviews', ['Paper:conference', 'Author'],
+     ['Paper:conference', 'Author']),
+    ('load_initial_journal_paper_reviews', ['Paper:journal', 'Author'],
+     ['Paper:journal', 'Author']),
+]
+
+EVOLVE_LOAD_STAGES = [
+    ('database_loader', 'set_num_of_reviewers', [], ['Conference', 'Journal']),
+    ('database_loader', 'load_schools', [], ['Organization']),
+    ('file_loader', 'generate_random_author_schools', [],
+     ['author_schools.csv']),
+    ('database_loader', 'load_author_schools',
+     ['Organization', 'author_schools.csv'], ['Author', 'Organization']),
+    ('database_loader', 'load_evolve_conference_paper_reviews', [],
+     ['Paper:conference', 'Author']),
+    ('database_loader', 'load_evolve_journal_paper_reviews', [],
+     ['Paper:journal', 'Author']),
+]
+
 if __name__ == "__main__":
 
     parser = argparse.ArgumentParser()
+    parser.add_argument('--bootstrap', action='store_true',
+                        help='download the NLTK corpora and spaCy model and '
+                        'export the gazetteer once')
     parser.add_argument('--parse', action='store_true')
     parser.add_argument('--load', action='store_true')
     parser.add_argument('--evolve', action='store_true')
     parser.add_argument('--recommend')
     parser.add_argument('--gurus', type=int)
+    parser.add_argument('--batch')
+    parser.add_argument('--serve', action='store_true')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--pool-size', type=int, default=50)
+    parser.add_argument('--output')
+    parser.add_argument('--pagerank', choices=['plugin', 'numpy'],
+                        default='plugin')
+    parser.add_argument('--nrows', type=int, default=10000)
+    parser.add_argument('--chunksize', type=int)
+    parser.add_argument('--processes', type=int, default=1)
+    parser.add_argument('--seed', type=int)
+    parser.add_argument('--cache', default='cache/annotations.sqlite')
+    parser.add_argument('--no-cache', dest='cache', action='store_const',
+                        const=None)
+    parser.add_argument('--venues', choices=['geograpy', 'gazetteer'],
+                        default='geograpy')
+    parser.add_argument('--gazetteer', default='input/cities.txt')
+    parser.add_argument('--jobs', type=int, default=1)
+    parser.add_argument('--ingest', choices=['csv', 'unwind'], default='csv')
+    parser.add_argument('--batch-size', type=int, default=10000)
+    parser.add_argument('--verify-plans', action='store_true')
+    parser.add_argument('--refresh-statistics', action='store_true')
+    parser.add_argument('--citation-density', type=float, default=0.01)
+    parser.add_argument('--citation-exponent', type=float)
+    parser.add_argument('--bulk-import', action='store_true')
+    parser.add_argument('--incremental', action='store_true')
+    parser.add_argument('--delete-batch-size', type=int, default=10000)
+    parser.add_argument('--result-cache', default='cache/results.sqlite')
+    parser.add_argument('--no-result-cache', dest='result_cache',
+                        action='store_const', const=None)
+    parser.add_argument('--result-ttl', type=float, default=24 * 3600)
+    parser.add_argument('--state', default='cache/dblp_state.sqlite')
+    parser.add_argument('--report', help='append a JSON-lines stage report')
+    parser.add_argument('--progress', action='store_true')
+    parser.add_argument('--profile-plans', nargs='?', const='cache/plans',
+                        help='save the plan of every statement per stage')
     args = parser.parse_args()
 
-    if args.parse and not args.evolve:
-        file_loader = DBLP_Loader()
-        file_loader.extract_conferences()
-        file_loader.extract_journals()
-        file_loader.extract_conference_venues()
-        file_loader.extract_conference_papers()
-        file_loader.extract_journal_papers()
-        file_loader.extract_conference_authors()
-        file_loader.extract_journal_authors()
-        file_loader.generate_random_conference_reviewers()
-        file_loader.generate_random_journal_reviewers()
-        print("Copy files generated in 'output' folder to '/var/lib/neo4j/import'")
-    elif args.load and not args.evolve:
+    options = {
+        'nrows': args.nrows,
+        'chunksize': args.chunksize,
+        'processes': args.processes,
+        'seed': args.seed,
+        'cache_path': args.cache,
+        'venues': args.venues,
+        'gazetteer_path': args.gazetteer,
+        'state_path': args.state if args.incremental else None,
+    }
+
+    result_cache = Result_Cache(ttl=args.result_ttl, path=args.result_cache)
+    # Plans are saved per stage, which the report's measurement provides
+    report = Run_Report(args.report, progress=args.progress) \
+        if args.report or args.progress or args.profile_plans else None
+    plan_capture = Plan_Capture(
+        args.profile_plans,
+        default_stage='recommend' if args.recommend or args.batch or args.serve
+        else 'statements') if args.profile_plans else None
+
+    if args.bootstrap:
+        from dblp_loader import bootstrap
+        bootstrap(args.gazetteer)
+    elif args.verify_plans:
+        from neo4j_loader import Neo4J_Loader
         database_loader = Neo4J_Loader()
-        database_loader.load_conferences()
-        database_loader.add_index_to_conferences()
-        database_loader.load_journals()
-        database_loader.add_index_to_journals()
-        database_loader.load_conference_venues()
-        database_loader.delete_papers()
-        database_loader.load_conference_papers()
-        database_loader.load_journal_papers()
-        database_loader.add_index_to_papers()
-        database_loader.load_conference_paper_keywords()
-        database_loader.load_journal_paper_keywords()
-        database_loader.add_index_to_authors()
-        database_loader.load_corresponding_conference_authors()
-        database_loader.load_corresponding_journal_authors()
-        database_loader.load_non_corresponding_conference_authors()
-        database_loader.load_non_corresponding_journal_authors()
-        database_loader.generate_random_citations()
-        database_loader.load_initial_conference_paper_reviews()
-        database_loader.load_initial_journal_paper_reviews()
+        database_loader.verify_query_plans()
+    elif args.refresh_statistics:
+        from neo4j_loader import Neo4J_Loader
+        database_loader = Neo4J_Loader(plan_capture=plan_capture)
+        # A bulk imported graph has no constraints or indexes yet
+        database_loader.create_schema()
+        database_loader.refresh_topic_statistics('Conference')
+        database_loader.refresh_topic_statistics('Journal')
+    elif args.parse and not args.evolve:
+        from dblp_loader import run_stage
+        if args.incremental:
+            run_stage(options, 'prepare_delta')
+        scheduler = Stage_Scheduler(jobs=args.jobs, processes=True,
+                                    report=report)
+        stages = PARSE_STAGES + (SCHOOL_STAGES if args.bulk_import else [])
+        for stage, inputs, outputs in stages:
+            scheduler.add(stage, partial(run_stage, options, stage),
+                          inputs, outputs)
+        scheduler.run()
+        if args.bulk_import:
+            from bulk_import import Bulk_Import_Writer
+            writer = Bulk_Import_Writer(
+                citation_density=args.citation_density,
+                citation_exponent=args.citation_exponent, seed=args.seed)
+            writer.write_all()
+            print('Build a fresh database with:')
+            print(writer.command())
+            print('Then start it and run --refresh-statistics, which also '
+                  'creates the constraints and indexes.')
+        else:
+            print("Copy files generated in 'output' folder to '/var/lib/neo4j/import'")
+    elif args.load and not args.evolve:
+        from neo4j_loader import Neo4J_Loader
+        database_loader = Neo4J_Loader(
+            mode=args.ingest, batch_size=args.batch_size,
+            citation_density=args.citation_density,
+            citation_exponent=args.citation_exponent, seed=args.seed,
+            incremental=args.incremental,
+            delete_batch_size=args.delete_batch_size,
+            plan_capture=plan_capture)
+        database_loader.create_schema()
+        scheduler = Stage_Scheduler(jobs=args.jobs, report=report)
+        for stage, inputs, outputs in LOAD_STAGES:
+            scheduler.add(stage, getattr(database_loader, stage),
+                          inputs, outputs)
+        scheduler.run()
+        if args.incremental:
+            # Only a loaded delta is committed, until then every parse
+            # compares against the last loaded state and keeps its records
+            from delta_state import Delta_State
+            Delta_State(args.state).commit()
+            print('Incremental parse state saved.')
         print('All data loaded.')
     elif args.parse and args.evolve:
-        file_loader = DBLP_Loader()
-        file_loader.extract_schools()
+        from dblp_loader import DBLP_Loader
+        file_loader = DBLP_Loader(**options)
+        if report is not None:
+            report.run('extract_schools', file_loader.extract_schools)
+        else:
+            file_loader.extract_schools()
         print("Copy files generated in 'output' folder to '/var/lib/neo4j/import'")
     elif args.load and args.evolve:
-        file_loader = DBLP_Loader()
-        database_loader = Neo4J_Loader()
-        database_loader.set_num_of_reviewers()
-        database_loader.load_schools()
-        file_loader.generate_random_author_schools()
-        database_loader.load_author_schools()
-        database_loader.load_evolve_conference_paper_reviews()
-        database_loader.load_evolve_journal_paper_reviews()
+        from dblp_loader import DBLP_Loader
+        from neo4j_loader import Neo4J_Loader
+        file_loader = DBLP_Loader(**options)
+        database_loader = Neo4J_Loader(
+            mode=args.ingest, batch_size=args.batch_size,
+            citation_density=args.citation_density,
+            citation_exponent=args.citation_exponent, seed=args.seed,
+            incremental=args.incremental,
+            delete_batch_size=args.delete_batch_size,
+            plan_capture=plan_capture)
+        loaders = {'file_loader': file_loader,
+                   'database_loader': database_loader}
+        database_loader.create_schema()
+        scheduler = Stage_Scheduler(jobs=args.jobs, report=report)
+        for loader, stage, inputs, outputs in EVOLVE_LOAD_STAGES:
+            scheduler.add(stage, getattr(loaders[loader], stage),
+                          inputs, outputs)
+        scheduler.run()
         print('All data loaded.')
+    elif args.serve:
+        from recommendation_service import Recommendation_Service
+        query_runner = Query_Runner(cache=result_cache, pagerank=args.pagerank,
+                                    pool_size=args.pool_size,
+                                    plan_capture=plan_capture)
+        service = Recommendation_Service(query_runner, host=args.host,
+                                         port=args.port, workers=args.pool_size)
+        service.serve()
+    elif args.batch:
+        query_runner = Query_Runner(cache=result_cache, pagerank=args.pagerank,
+                                    plan_capture=plan_capture)
+        output = open(args.output, 'w', encoding='utf-8') if args.output else sys.stdout
+        with output:
+            for result in query_runner.recommend_batch(
+                    read_keyword_sets(args.batch), threshold=args.gurus):
+                output.write(json.dumps(result) + '\n')
     elif args.recommend and args.gurus:
-        keywords = """['data', 'database', 'management', 'olap', 'postgres', 'xml', 'relational', 'queries', 'sql']"""
-        query_runner = Query_Runner()
-        publications = query_runner.get_publication_communities(args.recommend)
-        papers = query_runner.get_top_papers(publications)
-        gurus = query_runner.get_gurus(papers, args.gurus)
+        query_runner = Query_Runner(cache=result_cache, pagerank=args.pagerank,
+                                    plan_capture=plan_capture)
+        gurus = query_runner.recommend_gurus(args.recommend, args.gurus)
         print('Gurus:')
         print(gurus)
     elif args.recommend:
-        query_runner = Query_Runner()
-        publications = query_runner.get_publication_communities(args.recommend)
-        papers = query_runner.get_top_papers(publications)
-        authors = query_runner.get_authors(papers)
+        query_runner = Query_Runner(cache=result_cache, pagerank=args.pagerank,
+                                    plan_capture=plan_capture)
+        authors = query_runner.recommend_reviewers(args.recommend)
         print('Recommended reviewers:')
         print(authors)
@@ -1,314 +1,547 @@
 import os
+import csv
+import time
 import pandas as pd
 from neo4j import GraphDatabase
+from neo4j.exceptions import ServiceUnavailable, TransientError
+from schema_manager import Schema_Manager
+from citation_generator import Citation_Generator
+from instrumentation import record_rows, record_counters
+
+
+# Per-row Cypher for every generated file, `row` holds the CSV fields. The
+# same statement runs after LOAD CSV or after UNWIND $rows.
+LOAD_QUERIES = {
+    'conferences': ('proceedings.csv', """
+        WITH row
+            WITH toString(toInteger(row[1])) + '-01-01' AS startDate, row
+                WITH toString(toInteger(row[1])) + '-01-02' AS endDate, startDate, row
+                    MERGE (c:Conference { title: row[0], startDate: startDate })
+                    SET c.endDate = endDate, c.edition = row[1]
+    """),
+    'journals': ('journals.csv', """
+        WITH row
+            WITH toString(toInteger(row[1])) + '-01-01' AS date, row
+                MERGE (j:Journal { title: row[0], date: date, volume: row[2] })
+    """),
+    'conference_papers': ('conference_papers.csv', """
+        WITH row
+            MERGE (p:Paper { key: row[0] })
+            SET p.title = row[1], p.abstract = row[4]
+            WITH row, p
+                MATCH (c:Conference { title: row[2], startDate: toString(toInteger(row[3])) + '-01-01' })
+                MERGE (c)-[:HAS]->(p)
+    """),
+    'conference_paper_keywords': ('conference_paper_keywords.csv', """
+        WITH row
+            MATCH (p:Paper { key: row[0] })
+            WITH row, p
+                MERGE (k:Keyword { keyword: row[1] })
+                MERGE (p)-[:HAS]->(k)
+    """),
+    'journal_papers': ('journal_papers.csv', """
+        WITH row
+            MERGE (p:Paper { key: row[0] })
+            SET p.title = row[1], p.abstract = row[5]
+            WITH row, p
+                MATCH (j:Journal { title: row[2], date: toString(toInteger(row[3])) + '-01-01', volume: row[4] })
+                MERGE (j)-[:HAS]->(p)
+    """),
+    'journal_paper_keywords': ('journal_paper_keywords.csv', """
+        WITH row
+            MATCH (p:Paper { key: row[0] })
+            WITH row, p
+                MERGE (k:Keyword { keyword: row[1] })
+                MERGE (p)-[:HAS]->(k)
+    """),
+    'conference_venues': ('conference_venues.csv', """
+        WITH row
+            MATCH (c:Conference { title: row[0] })
+            SET c.venue = row[1]
+    """),
+    'corresponding_conference_authors': ('corresponding_conference_authors.csv', """
+        WITH row
+            MERGE (a:Author { name: row[1] })
+            WITH row, a
+                MATCH (p:Paper { key: row[0] })
+                MERGE (a)-[w:WRITE]->(p)
+                SET w.is_corresponding = true
+    """),
+    'corresponding_journal_authors': ('corresponding_journal_authors.csv', """
+        WITH row
+            MERGE (a:Author { name: row[1] })
+            WITH row, a
+                MATCH (p:Paper { key: row[0] })
+                MERGE (a)-[w:WRITE]->(p)
+                SET w.is_corresponding = true
+    """),
+    'non_corresponding_conference_authors': ('non_corresponding_conference_authors.csv', """
+        WITH row
+            MERGE (a:Author { name: row[1] })
+            WITH row, a
+                MATCH (p:Paper { key: row[0] })
+                MERGE (a)-[:WRITE]->(p)
+    """),
+    'non_corresponding_journal_authors': ('non_corresponding_journal_authors.csv', """
+        WITH row
+            MERGE (a:Author { name: row[1] })
+            WITH row, a
+                MATCH (p:Paper { key: row[0] })
+                MERGE (a)-[:WRITE]->(p)
+    """),
+    'schools': ('schools.csv', """
+        WITH row
+            MERGE (o:Organization { name: row[0] })
+    """),
+    'author_schools': ('author_schools.csv', """
+        WITH row
+            MATCH (a:Author { name: row[0] })
+            WITH row, a
+                MATCH (o:Organization { name: row[1] })
+                MERGE (a)-[:AFFILIATED_WITH]->(o)
+    """),
+    'initial_conference_paper_reviews': ('conference_paper_reviewers.csv', """
+        MATCH (p:Paper { key: row[0] })
+        WITH row, p
+            MATCH (a:Author { name: row[1] })
+            MERGE (a)-[:REVIEW]->(p)
+    """),
+    'initial_journal_paper_reviews': ('conference_paper_reviewers.csv', """
+        MATCH (p:Paper { key: row[0] })
+        WITH row, p
+            MATCH (a:Author { name: row[1] })
+            MERGE (p)<-[:REVIEW]-(a)
+    """),
+    'evolve_conference_paper_reviews': ('conference_paper_reviewers.csv', """
+        MATCH (p:Paper { key: row[0] })
+        WITH row, p
+            MATCH (a:Author { name: row[1] })
+            MATCH (a)-[r:REVIEW]->(p)
+            SET r.accept = true
+            SET r.textual_description = row[2]
+    """),
+    'evolve_journal_paper_reviews': ('conference_paper_reviewers.csv', """
+        MATCH (p:Paper { key: row[0] })
+        WITH row, p
+            MATCH (a:Author { name: row[1] })
+            MATCH (a)-[r:REVIEW]->(p)
+            SET r.accept = true
+            SET r.textual_description = row[2]
+    """),
+}
+
+# Relationships of a changed paper are rebuilt from the delta files,
+# reviews included since its reviewers are drawn again. The venues it is
+# detached from are returned, a paper that moved leaves stale statistics.
+STALE_PAPER_QUERY = """
+    UNWIND $rows AS row
+        MATCH (p:Paper { key: row[0] })
+        OPTIONAL MATCH (x)-[:HAS]->(p)
+        WHERE x:Conference OR x:Journal
+        WITH p, collect(x) AS venues
+            MATCH (p)-[r:HAS|WRITE|REVIEW]-()
+            DELETE r
+            WITH DISTINCT venues
+                UNWIND venues AS x
+                RETURN DISTINCT id(x) AS id,
+                       CASE WHEN x:Conference THEN 'Conference' ELSE 'Journal' END AS label
+"""
+
+# Restaged authors get a new random school, the old affiliation goes first
+STALE_AFFILIATION_QUERY = """
+    UNWIND $rows AS row
+        MATCH (a:Author { name: row[0] })
+        WITH a
+            MATCH (a)-[r:AFFILIATED_WITH]->(:Organization)
+            DELETE r
+"""
+
+# Every venue of a label is updated, so these plan a label scan by design,
+# one statement per label keeps them off an all nodes scan
+NUM_OF_REVIEWERS_QUERIES = {
+    'conference_reviewers': """
+        MATCH (c:Conference)
+        SET c.num_of_reviewers = 3
+    """,
+    'journal_reviewers': """
+        MATCH (j:Journal)
+        SET j.num_of_reviewers = 3
+    """,
+}
+
+# A random token rather than a counter, a wiped or freshly imported database
+# would count again from the start and hit the old graph's cached results
+GRAPH_VERSION_QUERY = """
+    MERGE (v:GraphVersion { name: 'graph' })
+    SET v.version = randomUUID()
+"""
+
+# Per-venue keyword counts and paper totals read by get_publication_communities.
+# A TOPIC relationship counts the (paper, keyword) pairs of its venue.
+TOPIC_STATISTICS_QUERY = """
+    UNWIND $rows AS row
+        MATCH (x) WHERE id(x) = row[0]
+        OPTIONAL MATCH (x)-[t:TOPIC]->(:Keyword)
+        DELETE t
+        WITH DISTINCT x
+            OPTIONAL MATCH (x)-[:HAS]->(p:Paper)
+            WITH x, count(p) AS papers
+                SET x.num_of_papers = papers
+                WITH x
+                    MATCH (x)-[:HAS]->(:Paper)-[:HAS]->(k:Keyword)
+                    WITH x, k, count(*) AS papers
+                        CREATE (x)-[:TOPIC { papers: papers }]->(k)
+"""
+
+CITATION_QUERY = """
+    UNWIND $rows AS row
+        MATCH (p1:Paper { key: row[0] })
+        WITH row, p1
+            MATCH (p2:Paper { key: row[1] })
+            MERGE (p1)-[:CITED_BY]->(p2)
+"""
 
 
 class Neo4J_Loader():
 
-    def __init__(self, *args, **kwargs):
+    def __init__(self, mode='csv', batch_size=10000, retries=3,
+                 output_dir='output', citation_density=0.01,
+                 citation_exponent=None, seed=None, incremental=False,
+                 delete_batch_size=10000, plan_capture=None, *args, **kwargs):
         self.driver = GraphDatabase.driver(
             os.getenv('NEO4J_URL'), auth=(os.getenv('NEO4J_USER'), os.getenv('NEO4J_PASSWORD')))
+        self.mode = mode
+        self.batch_size = batch_size
+        self.retries = retries
+        self.delete_batch_size = delete_batch_size
+        self.output_dir = output_dir
+        # Incremental loads upsert the delta and never wipe a label
+        self.incremental = incremental
+        self.schema_manager = Schema_Manager(self.driver)
+        self.citation_generator = Citation_Generator(
+            density=citation_density, exponent=citation_exponent, seed=seed)
+        # A Plan_Capture saves the plan of every statement per stage
+        self.plan_capture = plan_capture
+        # Venue ids per label whose changed papers were detached this run
+        self.stale_venues = {'Conference': set(), 'Journal': set()}
         return super().__init__(*args, **kwargs)
 
-    def load_conferences(self):
-        print('Loading conferences to Neo4J...')
-        with self.driver.session() as session:
-            session.run("""
-                MATCH (c:Conference) DETACH DELETE c
-            """)
-            session.run("""
-                LOAD CSV FROM 'file:///proceedings.csv' AS row
-                WITH row
-                    WITH toString(toInteger(row[1])) + '-01-01' AS startDate, row
-                        WITH toString(toInteger(row[1])) + '-01-02' AS endDate, startDate, row
-                            CREATE (c:Conference { title: row[0], startDate: startDate, endDate: endDate, edition: row[1] })
-                            RETURN c
-            """)
-            print('Conferences loaded.')
-
-    def add_index_to_conferences(self):
+    def create_schema(self):
+        self.schema_manager.create()
+
+    def verify_query_plans(self):
+        queries = {name: f'UNWIND $rows AS row {query}'
+                   for name, (_, query) in LOAD_QUERIES.items()}
+        queries['citations'] = CITATION_QUERY
+        queries['stale_papers'] = STALE_PAPER_QUERY
+        queries['stale_affiliations'] = STALE_AFFILIATION_QUERY
+        queries.update(NUM_OF_REVIEWERS_QUERIES)
+        violations = self.schema_manager.verify(
+            queries, label_scans=NUM_OF_REVIEWERS_QUERIES.keys())
+        for name, operators in violations.items():
+            print(f'{name}: {", ".join(operators)}')
+        if not violations:
+            print('No load statement plans a cartesian product or unexpected scan.')
+        return violations
+
+    def load_csv(self, name):
+        file_name, query = LOAD_QUERIES[name]
+        if self.mode == 'unwind':
+            self.load_batches(file_name, f'UNWIND $rows AS row {query}')
+            return
+        query = f"LOAD CSV FROM 'file:///{file_name}' AS row {query}"
         with self.driver.session() as session:
-            session.run('CREATE INDEX ON :Conference(title)')
-            session.run('CREATE INDEX ON :Conference(startDate)')
+            self.explain(session, name, query)
+            record_counters(self.write_transaction(
+                session, lambda tx: tx.run(query).consume()))
+        # The server reads its own copy, the local one gives the row count
+        if os.path.exists(os.path.join(self.output_dir, file_name)):
+            record_rows(rows_in=sum(1 for _ in self.read_rows(file_name)))
+        self.bump_graph_version()
 
-    def load_journals(self):
-        print('Loading journals to Neo4J...')
+    def explain(self, session, name, query, **parameters):
+        # Write statements are only explained, they still run as usual
+        if self.plan_capture is not None and self.plan_capture.wants(name):
+            summary = session.run(f'EXPLAIN {query}', parameters).consume()
+            self.plan_capture.add(name, 'EXPLAIN', query, summary.plan)
+
+    def read(self, session, name, query, **parameters):
+        # Read statements run under PROFILE while plans are captured
+        if self.plan_capture is None:
+            return list(session.run(query, parameters))
+        result = session.run(f'PROFILE {query}', parameters)
+        records = list(result)
+        self.plan_capture.add(name, 'PROFILE', query, result.summary().profile)
+        return records
+
+    def bump_graph_version(self):
+        # Query_Runner keys cached results on this token
         with self.driver.session() as session:
-            session.run("""
-                MATCH (j:Journal) DETACH DELETE j
-            """)
-            session.run("""
-                LOAD CSV FROM 'file:///journals.csv' AS row
-                WITH row
-                    WITH toString(toInteger(row[1])) + '-01-01' AS date, row
-                        CREATE (j:Journal { title: row[0], date: date, volume: row[2] })
-                        RETURN j
-            """)
-            print('Journals loaded.')
-
-    def add_index_to_journals(self):
+            self.explain(session, 'graph_version', GRAPH_VERSION_QUERY)
+            self.write_transaction(
+                session, lambda tx: tx.run(GRAPH_VERSION_QUERY).consume())
+
+    def read_rows(self, file_name):
+        # Empty fields become null, as they do with LOAD CSV
+        with open(os.path.join(self.output_dir, file_name), newline='', encoding='utf-8') as f:
+            for row in csv.reader(f):
+                yield [value if value != '' else None for value in row]
+
+    def batches(self, rows):
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) == self.batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    def write_transaction(self, session, work):
+        for attempt in range(self.retries + 1):
+            try:
+                return session.write_transaction(work)
+            except (ServiceUnavailable, TransientError) as error:
+                if attempt == self.retries:
+                    raise
+                print(f'Batch failed ({error}), retrying...')
+                time.sleep(2 ** attempt)
+
+    def write_batch(self, session, query, rows):
+        summary = self.write_transaction(
+            session, lambda tx: tx.run(query, rows=rows).consume())
+        record_counters(summary)
+        return summary
+
+    def delete_batches(self, query, name):
+        # Each transaction deletes at most delete_batch_size entities
+        def delete(tx):
+            result = tx.run(query, limit=self.delete_batch_size)
+            return result.single()['deleted'], result.summary()
+
+        deleted = 0
         with self.driver.session() as session:
-            session.run('CREATE INDEX ON :Journal(title)')
-            session.run('CREATE INDEX ON :Journal(date)')
-            session.run('CREATE INDEX ON :Journal(volume)')
+            self.explain(session, name, query, limit=self.delete_batch_size)
+            while True:
+                count, summary = self.write_transaction(session, delete)
+                record_counters(summary)
+                if not count:
+                    break
+                deleted += count
+                print(f'{name}: {deleted} deleted')
+        if deleted:
+            self.bump_graph_version()
+
+    def delete_relationships(self, pattern, name):
+        self.delete_batches(f"""
+            MATCH {pattern}
+            WITH DISTINCT r LIMIT $limit
+            DELETE r
+            RETURN count(*) AS deleted
+        """, name)
+
+    def delete_nodes(self, label):
+        # Relationships go first so a dense node never lands in one transaction
+        self.delete_relationships(f'(:{label})-[r]-()', f'{label} relationships')
+        self.delete_batches(f"""
+            MATCH (n:{label})
+            WITH n LIMIT $limit
+            DELETE n
+            RETURN count(*) AS deleted
+        """, f'{label} nodes')
 
-    def add_index_to_authors(self):
+    def write_rows(self, query, rows, name):
+        loaded = 0
         with self.driver.session() as session:
-            session.run('CREATE INDEX ON :Author(name)')
+            for batch in self.batches(rows):
+                self.explain(session, name, query, rows=batch)
+                self.write_batch(session, query, batch)
+                record_rows(rows_in=len(batch))
+                loaded += len(batch)
+                print(f'{name}: {loaded} rows loaded')
+        self.bump_graph_version()
+
+    def load_batches(self, file_name, query):
+        self.write_rows(query, self.read_rows(file_name), file_name)
+
+    def delta_keys(self, status):
+        return [key for key, key_status in self.read_rows('delta_papers.csv')
+                if key_status == status]
+
+    def load_conferences(self):
+        print('Loading conferences to Neo4J...')
+        if not self.incremental:
+            self.delete_nodes('Conference')
+        self.load_csv('conferences')
+        print('Conferences loaded.')
+
+    def load_journals(self):
+        print('Loading journals to Neo4J...')
+        if not self.incremental:
+            self.delete_nodes('Journal')
+        self.load_csv('journals')
+        print('Journals loaded.')
 
     def delete_papers(self):
-        with self.driver.session() as session:
-            session.run("""
-                MATCH (p:Paper) DETACH DELETE p
-            """)
+        if self.incremental:
+            self.remove_stale_paper_relationships()
+            return
+        self.delete_nodes('Paper')
 
     def load_conference_papers(self):
         print('Loading conference papers to Neo4J...')
-        with self.driver.session() as session:
-            session.run("""
-                LOAD CSV FROM 'file:///conference_papers.csv' AS row
-                WITH row
-                    CREATE (p:Paper { key: row[0], title: row[1], abstract: row[4] })
-                    WITH row, p
-                        MATCH (c:Conference { title: row[2], startDate: toString(toInteger(row[3])) + '-01-01' })
-                        CREATE (c)-[:HAS]->(p)
-                        RETURN p
-            """)
-            print('Conference papers loaded.')
+        self.load_csv('conference_papers')
+        print('Conference papers loaded.')
 
     def load_conference_paper_keywords(self):
         print('Loading conference paper keywords to Neo4J...')
+        self.load_csv('conference_paper_keywords')
+        self.refresh_topic_statistics('Conference')
+        print('Conference paper keywords loaded.')
+
+    def refresh_topic_statistics(self, label):
+        print(f'Refreshing {label} topic statistics...')
         with self.driver.session() as session:
-            session.run("""CREATE INDEX ON :Keyword(keyword) """)
-            session.run("""
-                LOAD CSV FROM 'file:///conference_paper_keywords.csv' AS row
-                WITH row
-                    MATCH (p:Paper { key: row[0] })
-                    WITH row, p
-                        MERGE (k:Keyword { keyword: row[1] })
-                        CREATE (p)-[:HAS]->(k)
-                        RETURN p
-            """)
-            print('Conference paper keywords loaded.')
+            if self.incremental:
+                # Only venues of papers in the delta changed
+                keys = [key for key, _ in self.read_rows('delta_papers.csv')]
+                ids = [record['id'] for record in self.read(session, f'{label} venues', f"""
+                    UNWIND $keys AS key
+                        MATCH (x:{label})-[:HAS]->(:Paper {{ key: key }})
+                        RETURN DISTINCT id(x) AS id
+                """, keys=keys)]
+                # Venues changed papers moved away from lost them too
+                ids = sorted(set(ids) | self.stale_venues[label])
+            else:
+                ids = [record['id'] for record in self.read(session, f'{label} venues', f"""
+                    MATCH (x:{label}) RETURN id(x) AS id
+                """)]
+        self.write_rows(TOPIC_STATISTICS_QUERY, ([id] for id in ids),
+                        f'{label} topic statistics')
+        print(f'{label} topic statistics refreshed.')
 
     def load_journal_papers(self):
         print('Loading journal papers to Neo4J...')
-        with self.driver.session() as session:
-            session.run("""
-                LOAD CSV FROM 'file:///journal_papers.csv' AS row
-                WITH row
-                    CREATE (p:Paper { key: row[0], title: row[1], abstract: row[5] })
-                    WITH row, p
-                        MATCH (j:Journal { title: row[2], date: toString(toInteger(row[3])) + '-01-01', volume: row[4] })
-                        CREATE (j)-[:HAS]->(p)
-                        RETURN p
-            """)
-            print('Journal papers loaded.')
+        self.load_csv('journal_papers')
+        print('Journal papers loaded.')
 
     def load_journal_paper_keywords(self):
         print('Loading journal paper keywords to Neo4J...')
-        with self.driver.session() as session:
-            session.run("""
-                LOAD CSV FROM 'file:///journal_paper_keywords.csv' AS row
-                WITH row
-                    MATCH (p:Paper { key: row[0] })
-                    WITH row, p
-                        MERGE (k:Keyword { keyword: row[1] })
-                        CREATE (p)-[:HAS]->(k)
-                        RETURN p
-            """)
-            print('Journal paper keywords loaded.')
-
-    def add_index_to_papers(self):
-        with self.driver.session() as session:
-            session.run('CREATE INDEX ON :Paper(key)')
+        self.load_csv('journal_paper_keywords')
+        self.refresh_topic_statistics('Journal')
+        print('Journal paper keywords loaded.')
 
     def delete_authors(self):
-        with self.driver.session() as session:
-            session.run("""
-                MATCH (a:Author) DETACH DELETE a
-            """)
+        self.delete_nodes('Author')
 
     def load_conference_venues(self):
         print('Loading conference venues...')
-        with self.driver.session() as session:
-            session.run("""
-                LOAD CSV FROM 'file:///conference_venues.csv' AS row
-                WITH row
-                    MATCH (c:Conference { title: row[0] })
-                    SET c.venue = row[1]
-                    RETURN c
-            """)
+        self.load_csv('conference_venues')
         print('Conference venues loaded.')
 
     def load_corresponding_conference_authors(self):
         print('Loading corresponding authors from conference papers...')
-        with self.driver.session() as session:
-            session.run("""
-                LOAD CSV FROM 'file:///corresponding_conference_authors.csv' AS row
-                WITH row
-                    MERGE (a:Author { name: row[1] })
-                    WITH row, a
-                        MATCH (p:Paper { key: row[0] })
-                        CREATE (a)-[:WRITE { is_corresponding: true }]->(p)
-                        RETURN a
-            """)
-            print('Corresponding conference authors loaded.')
+        self.load_csv('corresponding_conference_authors')
+        print('Corresponding conference authors loaded.')
 
     def load_corresponding_journal_authors(self):
         print('Loading corresponding authors from journal papers...')
-        with self.driver.session() as session:
-            session.run("""
-                LOAD CSV FROM 'file:///corresponding_journal_authors.csv' AS row
-                WITH row
-                    MERGE (a:Author { name: row[1] })
-                    WITH row, a
-                        MATCH (p:Paper { key: row[0] })
-                        CREATE (a)-[:WRITE { is_corresponding: true }]->(p)
-                        RETURN a
-            """)
-            print('Corresponding journal authors loaded.')
+        self.load_csv('corresponding_journal_authors')
+        print('Corresponding journal authors loaded.')
 
     def load_non_corresponding_conference_authors(self):
         print('Loading non-corresponding authors from conference papers...')
-        with self.driver.session() as session:
-            session.run("""
-                LOAD CSV FROM 'file:///non_corresponding_conference_authors.csv' AS row
-                WITH row
-                    MERGE (a:Author { name: row[1] })
-                    WITH row, a
-                        MATCH (p:Paper { key: row[0] })
-                        CREATE (a)-[:WRITE]->(p)
-                        RETURN a
-            """)
-            print('Non-corresponding conference authors loaded.')
+        self.load_csv('non_corresponding_conference_authors')
+        print('Non-corresponding conference authors loaded.')
 
     def load_non_corresponding_journal_authors(self):
         print('Loading non-corresponding authors from journal papers...')
-        with self.driver.session() as session:
-            session.run("""
-                LOAD CSV FROM 'file:///non_corresponding_journal_authors.csv' AS row
-                WITH row
-                    MERGE (a:Author { name: row[1] })
-                    WITH row, a
-                        MATCH (p:Paper { key: row[0] })
-                        CREATE (a)-[:WRITE]->(p)
-                        RETURN a
-            """)
-            print('Non-corresponding journal authors loaded.')
+        self.load_csv('non_corresponding_journal_authors')
+        print('Non-corresponding journal authors loaded.')
 
     def generate_random_citations(self):
         print('Generating random citations between papers...')
         with self.driver.session() as session:
-            session.run("""
-                MATCH (p1:Paper)
-                    WITH p1
-                    MATCH (p2:Paper) WHERE p1 <> p2 AND rand() < 0.01
-                        MERGE (p1)-[:CITED_BY]->(p2)
-                        RETURN p1, p2
-            """)
-            print('Citations generated.')
+            keys = [record['key'] for record in self.read(session, 'paper keys', """
+                MATCH (p:Paper) RETURN p.key AS key
+            """)]
+
+        # Incremental loads only draw citations from the new papers
+        sources = None
+        if self.incremental:
+            new_keys = set(self.delta_keys('new'))
+            sources = [i for i, key in enumerate(keys) if key in new_keys]
+        sources, targets = self.citation_generator.generate(len(keys), sources)
+        rows = ([keys[source], keys[target]]
+                for source, target in zip(sources, targets))
+        self.write_rows(CITATION_QUERY, rows, 'citations')
+        print('Citations generated.')
+
+    def remove_stale_paper_relationships(self):
+        print('Removing relationships of changed papers...')
+
+        def detach(tx, batch):
+            result = tx.run(STALE_PAPER_QUERY, rows=batch)
+            return list(result), result.summary()
+
+        rows = ([key] for key in self.delta_keys('changed'))
+        with self.driver.session() as session:
+            for batch in self.batches(rows):
+                self.explain(session, 'changed papers', STALE_PAPER_QUERY,
+                             rows=batch)
+                records, summary = self.write_transaction(
+                    session, lambda tx: detach(tx, batch))
+                record_counters(summary)
+                record_rows(rows_in=len(batch))
+                for record in records:
+                    self.stale_venues[record['label']].add(record['id'])
+        self.bump_graph_version()
+        print('Relationships of changed papers removed.')
 
     def load_schools(self):
         print('Loading schools...')
-        with self.driver.session() as session:
-            session.run("""
-                MATCH (o:Organization) DETACH DELETE o
-            """)
-            session.run("""
-                LOAD CSV FROM 'file:///schools.csv' AS row
-                WITH row
-                    CREATE (o:Organization { name: row[0] })
-                    RETURN o
-            """)
-            session.run('CREATE INDEX ON :Organization(name)')
-            print('Schools loaded.')
+        if not self.incremental:
+            self.delete_nodes('Organization')
+        self.load_csv('schools')
+        print('Schools loaded.')
 
     def load_author_schools(self):
         print('Loading author schools...')
-        with self.driver.session() as session:
-            session.run("""
-                MATCH (:Author)-[aw:AFFILIATED_WITH]->(:Organization) DETACH DELETE aw
-            """)
-            session.run("""
-                LOAD CSV FROM 'file:///author_schools.csv' AS row
-                WITH row
-                    MATCH (a:Author), (o:Organization)
-                    WHERE a.name = row[0]
-                    AND o.name = row[1]
-                    WITH row, a, o
-                        CREATE (a)-[:AFFILIATED_WITH]->(o)
-                        RETURN a, o
-            """)
-            print("Author's affiliations loaded.")
+        if not self.incremental:
+            self.delete_relationships('(:Author)-[r:AFFILIATED_WITH]->(:Organization)',
+                                      'AFFILIATED_WITH relationships')
+        else:
+            self.write_rows(STALE_AFFILIATION_QUERY,
+                            self.read_rows('author_schools.csv'),
+                            'restaged author affiliations')
+        self.load_csv('author_schools')
+        print("Author's affiliations loaded.")
 
     def set_num_of_reviewers(self):
         print('Setting number of reviewers to conferences and journals...')
         with self.driver.session() as session:
-            session.run("""
-                MATCH (x)
-                WHERE x:Conference OR x:Journal
-                SET x.num_of_reviewers = 3
-                RETURN x
-            """)
+            for name, query in NUM_OF_REVIEWERS_QUERIES.items():
+                self.explain(session, name, query)
+                record_counters(self.write_transaction(
+                    session, lambda tx: tx.run(query).consume()))
         print('Number of reviewers to conferences and journals have been set.')
 
     def load_initial_conference_paper_reviews(self):
         print('Loading conference paper reviewers...')
-        with self.driver.session() as session:
-            session.run("""
-                LOAD CSV FROM 'file:///conference_paper_reviewers.csv' AS row
-                    MATCH (p:Paper), (a:Author)
-                    WHERE p.key = row[0]
-                    AND a.name = row[1]
-                        WITH p, a, row
-                        MERGE (a)-[:REVIEW]->(p)
-                        RETURN a, p
-            """)
+        self.load_csv('initial_conference_paper_reviews')
         print('Conference paper reviewers loaded.')
 
     def load_initial_journal_paper_reviews(self):
         print('Loading journal paper reviewers...')
-        with self.driver.session() as session:
-            session.run("""
-                LOAD CSV FROM 'file:///conference_paper_reviewers.csv' AS row
-                    MATCH (p:Paper), (a:Author)
-                    WHERE p.key = row[0]
-                    AND a.name = row[1]
-                        WITH p, a, row
-                        MERGE (p)<-[:REVIEW]-(a)
-                        RETURN p, a
-            """)
+        self.load_csv('initial_journal_paper_reviews')
         print('Conference paper reviewers loaded.')
 
     def load_evolve_conference_paper_reviews(self):
         print('Loading suggested decision and textual description to reviews...')
-        with self.driver.session() as session:
-            session.run("""
-                LOAD CSV FROM 'file:///conference_paper_reviewers.csv' AS row
-                    MATCH (p:Paper), (a:Author)
-                    WHERE p.key = row[0]
-                    AND a.name = row[1]
-                        WITH p, a, row
-                        MATCH (a)-[r:REVIEW]->(p)
-                        SET r.accept = true
-                        SET r.textual_description = row[2]
-                        RETURN a, p
-            """)
+        self.load_csv('evolve_conference_paper_reviews')
         print('Conference paper reviewers loaded.')
 
     def load_evolve_journal_paper_reviews(self):
         print('Loading journal paper reviewers...')
-        with self.driver.session() as session:
-            session.run("""
-                LOAD CSV FROM 'file:///conference_paper_reviewers.csv' AS row
-                    MATCH (p:Paper), (a:Author)
-                    WHERE p.key = row[0]
-                    AND a.name = row[1]
-                        WITH p, a, row
-                        MATCH (a)-[r:REVIEW]->(p)
-                        SET r.accept = true
-                        SET r.textual_description = row[2]
-                        RETURN p, a
-            """)
+        self.load_csv('evolve_journal_paper_reviews')
         print('Conference paper reviewers loaded.')
@@ -0,0 +1,48 @@
+import numpy as np
+
+
+class PageRank():
+
+    def __init__(self, damping=0.85, tolerance=1e-6, max_iterations=20,
+                 *args, **kwargs):
+        self.damping = damping
+        self.tolerance = tolerance
+        self.max_iterations = max_iterations
+        # Iterations the last run took, for callers reporting convergence
+        self.iterations = 0
+        # Last score of every node, keyed by its Neo4j id, used as the start
+        # vector of the next run
+        self.scores = {}
+        return super().__init__(*args, **kwargs)
+
+    def start_vector(self, nodes):
+        return np.array([self.scores.get(node, 1 - self.damping) for node in nodes])
+
+    def rank(self, nodes, sources, targets):
+        # Same unnormalized formulation as algo.pageRank:
+        # score = (1 - d) + d * sum(score(source) / out_degree(source))
+        nodes = np.asarray(nodes, dtype=np.int64)
+        order = np.argsort(nodes)
+        nodes = nodes[order]
+        sources = np.searchsorted(nodes, np.asarray(sources, dtype=np.int64))
+        targets = np.searchsorted(nodes, np.asarray(targets, dtype=np.int64))
+        n = len(nodes)
+
+        out_degree = np.bincount(sources, minlength=n).astype(float)
+        out_degree[out_degree == 0] = 1
+        scores = self.start_vector(nodes)
+        self.iterations = 0
+        for self.iterations in range(1, self.max_iterations + 1):
+            contributions = (scores / out_degree)[sources]
+            updated = (1 - self.damping) + self.damping * np.bincount(
+                targets, weights=contributions, minlength=n)
+            delta = np.abs(updated - scores).max() if n else 0
+            scores = updated
+            if delta < self.tolerance:
+                break
+
+        self.scores.update(zip(nodes.tolist(), scores.tolist()))
+        # Scores are returned in the caller's node order
+        ranked = np.empty(n, dtype=scores.dtype)
+        ranked[order] = scores
+        return ranked
@@ -0,0 +1,154 @@
+import os
+import csv
+import sys
+import json
+import random
+import argparse
+from dblp_generator import DBLP_Generator
+from instrumentation import measure_stage
+
+
+# Stages in the order main.py runs them
+STAGES = [
+    'extract_conferences',
+    'extract_journals',
+    'extract_conference_venues',
+    'extract_conference_papers',
+    'extract_journal_papers',
+    'extract_conference_authors',
+    'extract_journal_authors',
+    'generate_random_conference_reviewers',
+    'generate_random_journal_reviewers',
+    'extract_schools',
+    'generate_random_author_schools',
+]
+
+
+class Parse_Benchmark():
+
+    def __init__(self, workdir='cache/benchmark', chunksize=None, seed=0,
+                 trace_memory=True, *args, **kwargs):
+        self.workdir = os.path.abspath(workdir)
+        self.chunksize = chunksize
+        self.seed = seed
+        self.trace_memory = trace_memory
+        return super().__init__(*args, **kwargs)
+
+    def run_scale(self, rows):
+        # Every scale gets its own input and output folders, the loaders use
+        # paths relative to the working directory
+        directory = os.path.join(self.workdir, str(rows))
+        os.makedirs(os.path.join(directory, 'output'), exist_ok=True)
+        if not os.path.exists(os.path.join(directory, 'input', 'output_school.csv')):
+            print(f'Generating {rows} synthetic rows...')
+            DBLP_Generator(rows=rows, seed=self.seed).write(
+                os.path.join(directory, 'input'))
+
+        from dblp_loader import DBLP_Loader
+        cwd = os.getcwd()
+        os.chdir(directory)
+        try:
+            # No annotation cache and the gazetteer venues, so every run does
+            # the same work without touching the network
+            loader = DBLP_Loader(nrows=None, chunksize=self.chunksize,
+                                 seed=self.seed, cache_path=None,
+                                 venues='gazetteer',
+                                 gazetteer_path='input/cities.txt')
+            results = []
+            for stage in STAGES:
+                result = measure_stage(stage, getattr(loader, stage),
+                                       self.trace_memory)
+                result['rows'] = rows
+                print(json.dumps(result))
+                results.append(result)
+            return results
+        finally:
+            os.chdir(cwd)
+
+    def run(self, scales):
+        return [result for rows in scales for result in self.run_scale(rows)]
+
+    def compare_venues(self, rows, sample=200, gazetteer_path=None):
+        # The gazetteer venues against geograpy's on a sample of the scale's
+        # proceedings titles, geograpy being the reference
+        from dblp_loader import ensure_nltk_data, extract_venue
+        from venue_extractor import Gazetteer_Venue_Extractor, compare_with_geograpy
+        directory = os.path.join(self.workdir, str(rows), 'input')
+        with open(os.path.join(directory, 'output_proceedings.csv'),
+                  newline='', encoding='utf-8') as f:
+            titles = [row['title'] for row in csv.DictReader(f, delimiter=';')]
+        titles = random.Random(self.seed).sample(titles, min(sample, len(titles)))
+        extractor = Gazetteer_Venue_Extractor(
+            gazetteer_path or os.path.join(directory, 'cities.txt'))
+        ensure_nltk_data()
+        agreement, mismatches = compare_with_geograpy(extractor, titles,
+                                                      extract_venue)
+        print(json.dumps({'rows': rows, 'venue_sample': len(titles),
+                          'venue_agreement': agreement}))
+        for title, expected, venue in mismatches[:10]:
+            print(f'  {title!r}: geograpy {expected!r}, gazetteer {venue!r}')
+        return agreement
+
+
+def compare(results, baseline, tolerance=0.2):
+    # A stage regresses when its wall time or traced peak grows by more than
+    # the tolerance over the baseline of the same scale
+    previous = {(result['rows'], result['stage']): result for result in baseline}
+    regressions = []
+    for result in results:
+        before = previous.get((result['rows'], result['stage']))
+        if before is None:
+            continue
+        for metric in ['wall', 'peak_traced']:
+            if metric in result and before.get(metric) and \
+                    result[metric] > before[metric] * (1 + tolerance):
+                regressions.append((result['rows'], result['stage'], metric,
+                                    before[metric], result[metric]))
+    return regressions
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--scales', type=int, nargs='+', default=[10000])
+    parser.add_argument('--chunksize', type=int)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--workdir', default='cache/benchmark')
+    parser.add_argument('--no-tracemalloc', dest='trace_memory',
+                        action='store_false')
+    parser.add_argument('--baseline', default='benchmarks/parse_baseline.json')
+    parser.add_argument('--save-baseline', action='store_true')
+    parser.add_argument('--tolerance', type=float, default=0.2)
+    parser.add_argument('--compare-venues', type=int, metavar='SAMPLE',
+                        help='check the gazetteer venues against geograpy')
+    parser.add_argument('--gazetteer',
+                        help='gazetteer to check, defaults to the generated one')
+    parser.add_argument('--min-agreement', type=float, default=0.9)
+    args = parser.parse_args()
+
+    benchmark = Parse_Benchmark(workdir=args.workdir, chunksize=args.chunksize,
+                                seed=args.seed, trace_memory=args.trace_memory)
+    results = benchmark.run(args.scales)
+
+    if args.compare_venues:
+        agreements = [benchmark.compare_venues(rows, args.compare_venues,
+                                               args.gazetteer)
+                      for rows in args.scales]
+        if min(agreements) < args.min_agreement:
+            sys.exit(f'Venue agreement below {args.min_agreement}')
+
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(args.baseline) or '.', exist_ok=True)
+        with open(args.baseline, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f'Baseline saved to {args.baseline}')
+    elif os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        for rows, stage, metric, before, after in regressions:
+            print(f'{stage} at {rows} rows: {metric} {before:.3f} -> {after:.3f}')
+        if regressions:
+            sys.exit(1)
+        print('No regressions against the baseline.')
+    else:
+        print(f'No baseline at {args.baseline}, run with --save-baseline')
@@ -0,0 +1,73 @@
+import os
+import json
+import threading
+from schema_manager import plan_operators
+import instrumentation
+
+
+# Operators worth a look in review, Eager materializes every row before the
+# next operator runs
+FLAGGED_OPERATORS = ['Eager', 'CartesianProduct']
+
+
+def plan_to_dict(plan):
+    # Profiled plans also carry the actual rows and db hits
+    arguments = dict(plan.arguments or {})
+    node = {
+        'operator': plan.operator_type.split('@')[0],
+        'identifiers': list(plan.identifiers or []),
+        'estimated_rows': arguments.get('EstimatedRows'),
+    }
+    if hasattr(plan, 'db_hits'):
+        node['rows'] = plan.rows
+        node['db_hits'] = plan.db_hits
+    node['children'] = [plan_to_dict(child) for child in plan.children]
+    return node
+
+
+def plan_flags(plan):
+    return [operator for operator in
+            (operator.split('@')[0] for operator in plan_operators(plan))
+            if operator in FLAGGED_OPERATORS]
+
+
+class Plan_Capture():
+
+    def __init__(self, directory='cache/plans', default_stage='statements',
+                 *args, **kwargs):
+        self.directory = directory
+        # Statements run outside a measured stage, e.g. recommendations
+        self.default_stage = default_stage
+        self.stages = {}
+        self.lock = threading.Lock()
+        return super().__init__(*args, **kwargs)
+
+    def stage_name(self):
+        # The stage measured on this thread, see instrumentation.measure_stage
+        stage = getattr(instrumentation.current, 'stage', None)
+        return stage['stage'] if stage else self.default_stage
+
+    def wants(self, name):
+        # Repeated batches of a statement share its plan, the first is kept
+        return name not in self.stages.get(self.stage_name(), {})
+
+    def add(self, name, mode, query, plan):
+        stage = self.stage_name()
+        flags = plan_flags(plan)
+        with self.lock:
+            statements = self.stages.setdefault(stage, {})
+            if name in statements:
+                return
+            statements[name] = {
+                'name': name,
+                'mode': mode,
+                'query': ' '.join(query.split()),
+                'flags': flags,
+                'plan': plan_to_dict(plan),
+            }
+            os.makedirs(self.directory, exist_ok=True)
+            with open(os.path.join(self.directory, f'{stage}.json'), 'w') as f:
+                json.dump({'stage': stage, 'statements': list(statements.values())},
+                          f, indent=2)
+        if flags:
+            print(f'{stage}: {name} plans {", ".join(flags)}')
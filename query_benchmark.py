@@ -0,0 +1,243 @@
+import os
+import csv
+import sys
+import json
+import time
+import random
+import argparse
+import subprocess
+from neo4j import GraphDatabase
+from neo4j.exceptions import ServiceUnavailable
+from parse_benchmark import Parse_Benchmark
+from neo4j_loader import Neo4J_Loader
+from query_runner import Query_Runner
+from schema_manager import plan_db_hits
+
+
+NEO4J_IMAGE = 'neo4j:3.5'
+
+# Query_Runner steps timed per keyword set, in recommendation order
+STEPS = ['get_publication_communities', 'get_top_papers', 'get_authors',
+         'get_gurus']
+
+
+def percentile(values, q):
+    # Nearest-rank percentile
+    values = sorted(values)
+    if not values:
+        return None
+    return values[min(len(values) - 1, max(0, int(round(q / 100 * len(values))) - 1))]
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'],
+                                       stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class Query_Benchmark():
+
+    def __init__(self, workdir='cache/benchmark', chunksize=None, seed=0,
+                 docker=False, port=7687, threshold=2, pagerank='plugin',
+                 citation_degree=5, citation_density=None, *args, **kwargs):
+        self.workdir = workdir
+        self.chunksize = chunksize
+        self.seed = seed
+        self.docker = docker
+        self.port = port
+        self.threshold = threshold
+        self.pagerank = pagerank
+        # Without a fixed density, every paper cites citation_degree papers
+        # on average at any scale instead of density * n
+        self.citation_degree = citation_degree
+        self.citation_density = citation_density
+        self.random = random.Random(seed)
+        self.container = None
+        return super().__init__(*args, **kwargs)
+
+    def start_neo4j(self):
+        # A throwaway server with the graph algorithms plugin, removed again
+        # by stop_neo4j
+        print(f'Starting {NEO4J_IMAGE}...')
+        self.container = subprocess.check_output([
+            'docker', 'run', '-d', '--rm', '-p', f'{self.port}:7687',
+            '-e', 'NEO4J_AUTH=none',
+            '-e', 'NEO4JLABS_PLUGINS=["graph-algorithms"]',
+            '-e', 'NEO4J_dbms_security_procedures_unrestricted=algo.*',
+            NEO4J_IMAGE]).decode().strip()
+        os.environ['NEO4J_URL'] = f'bolt://localhost:{self.port}'
+        os.environ['NEO4J_USER'] = 'neo4j'
+        os.environ['NEO4J_PASSWORD'] = 'neo4j'
+        for _ in range(120):
+            try:
+                driver = GraphDatabase.driver(os.environ['NEO4J_URL'],
+                                              auth=('neo4j', 'neo4j'))
+                with driver.session() as session:
+                    session.run('RETURN 1').consume()
+                driver.close()
+                return
+            except (ServiceUnavailable, OSError):
+                time.sleep(1)
+        raise RuntimeError('Neo4j did not start')
+
+    def stop_neo4j(self):
+        if self.container:
+            subprocess.call(['docker', 'stop', self.container],
+                            stdout=subprocess.DEVNULL)
+            self.container = None
+
+    def build_graph(self, rows):
+        # Parse synthetic inputs with the parse benchmark, then load them
+        # with the regular load stages
+        from main import LOAD_STAGES
+        Parse_Benchmark(workdir=self.workdir, chunksize=self.chunksize,
+                        seed=self.seed, trace_memory=False).run_scale(rows)
+        output_dir = os.path.join(self.workdir, str(rows), 'output')
+
+        # The generator writes rows conference and rows journal papers
+        density = self.citation_density
+        if density is None:
+            density = min(1.0, self.citation_degree / max(2 * rows - 1, 1))
+        loader = Neo4J_Loader(mode='unwind', output_dir=output_dir,
+                              citation_density=density, seed=self.seed)
+        loader.delete_relationships('()-[r]->()', 'relationships')
+        loader.delete_batches("""
+            MATCH (n)
+            WITH n LIMIT $limit
+            DELETE n
+            RETURN count(*) AS deleted
+        """, 'nodes')
+        loader.create_schema()
+        for stage, _, _ in LOAD_STAGES:
+            getattr(loader, stage)()
+        loader.driver.close()
+        return output_dir
+
+    def workload(self, output_dir, size=100):
+        # Keyword sets of one to three keywords drawn from the loaded ones
+        keywords = set()
+        for file_name in ['conference_paper_keywords.csv',
+                          'journal_paper_keywords.csv']:
+            with open(os.path.join(output_dir, file_name), newline='', encoding='utf-8') as f:
+                keywords.update(row[-1] for row in csv.reader(f) if row)
+        keywords = sorted(keyword for keyword in keywords if keyword)
+        return [self.random.sample(keywords, self.random.randint(1, min(3, len(keywords))))
+                for _ in range(size)]
+
+    def measure(self, runner, step, arguments, latencies, db_hits):
+        # Timed on a plain run, db hits are only read from a profiled one
+        start = time.perf_counter()
+        result = getattr(runner, step)(*arguments)
+        if runner.profiles is None:
+            latencies[step].append(time.perf_counter() - start)
+        else:
+            db_hits[step].append(sum(plan_db_hits(plan)
+                                     for _, plan in runner.profiles))
+            runner.profiles = []
+        return result
+
+    def replay(self, runner, keyword_sets):
+        latencies = {step: [] for step in STEPS}
+        db_hits = {step: [] for step in STEPS}
+        for keywords in keyword_sets:
+            for profile in [False, True]:
+                runner.profiles = [] if profile else None
+                communities = self.measure(runner, 'get_publication_communities',
+                                           [keywords], latencies, db_hits)
+                papers = self.measure(runner, 'get_top_papers', [communities],
+                                      latencies, db_hits)
+                self.measure(runner, 'get_authors', [papers], latencies, db_hits)
+                self.measure(runner, 'get_gurus', [papers, self.threshold],
+                             latencies, db_hits)
+        runner.profiles = None
+
+        report = {}
+        for step in STEPS:
+            report[step] = {
+                'count': len(latencies[step]),
+                'p50': percentile(latencies[step], 50),
+                'p95': percentile(latencies[step], 95),
+                'p99': percentile(latencies[step], 99),
+                'db_hits_p50': percentile(db_hits[step], 50),
+                'db_hits_max': max(db_hits[step]) if db_hits[step] else None,
+            }
+        return report
+
+    def run(self, scales, workload_size=100, keyword_sets=None):
+        results = []
+        if self.docker:
+            self.start_neo4j()
+        try:
+            for rows in scales:
+                output_dir = self.build_graph(rows)
+                sets = keyword_sets or self.workload(output_dir, workload_size)
+                runner = Query_Runner(pagerank=self.pagerank)
+                print(f'Replaying {len(sets)} keyword sets on {rows} rows...')
+                result = {
+                    'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+                    'revision': git_revision(),
+                    'rows': rows,
+                    'pagerank': self.pagerank,
+                    'citation_degree': self.citation_degree,
+                    'citation_density': self.citation_density,
+                    'queries': self.replay(runner, sets),
+                }
+                runner.driver.close()
+                print(json.dumps(result, indent=2))
+                results.append(result)
+        finally:
+            self.stop_neo4j()
+        return results
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--scales', type=int, nargs='+', default=[10000])
+    parser.add_argument('--chunksize', type=int)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--workdir', default='cache/benchmark')
+    parser.add_argument('--workload', help='keyword sets, one per line')
+    parser.add_argument('--workload-size', type=int, default=100)
+    parser.add_argument('--threshold', type=int, default=2)
+    parser.add_argument('--pagerank', choices=['plugin', 'numpy'],
+                        default='plugin')
+    parser.add_argument('--citation-degree', type=float, default=5,
+                        help='mean citations per paper')
+    parser.add_argument('--citation-density', type=float,
+                        help='fixed density, overrides --citation-degree')
+    parser.add_argument('--docker', action='store_true')
+    parser.add_argument('--port', type=int, default=7687)
+    parser.add_argument('--wipe', action='store_true',
+                        help='allow wiping the database in NEO4J_URL')
+    parser.add_argument('--history', default='benchmarks/query_history.jsonl')
+    args = parser.parse_args()
+
+    if not args.docker and not args.wipe:
+        sys.exit('The benchmark wipes the database, pass --docker for a '
+                 'throwaway one or --wipe to use NEO4J_URL')
+    if not args.docker:
+        from dotenv import load_dotenv
+        load_dotenv()
+
+    keyword_sets = None
+    if args.workload:
+        from query_runner import read_keyword_sets
+        keyword_sets = [request['keywords']
+                        for request in read_keyword_sets(args.workload)]
+
+    benchmark = Query_Benchmark(workdir=args.workdir, chunksize=args.chunksize,
+                                seed=args.seed, docker=args.docker,
+                                port=args.port, threshold=args.threshold,
+                                pagerank=args.pagerank,
+                                citation_degree=args.citation_degree,
+                                citation_density=args.citation_density)
+    results = benchmark.run(args.scales, args.workload_size, keyword_sets)
+
+    os.makedirs(os.path.dirname(args.history) or '.', exist_ok=True)
+    with open(args.history, 'a') as f:
+        for result in results:
+            f.write(json.dumps(result) + '\n')
+    print(f'Results appended to {args.history}')
@@ -1,55 +1,270 @@
 import os
+import ast
+import json
+from collections import Counter
 from neo4j import GraphDatabase
+from result_cache import Result_Cache
+
+
+# Every query is sent with the same text and only its parameters change, so
+# Neo4j plans each of them once. Communities are read from the per-venue
+# TOPIC statistics the loaders maintain.
+QUERIES = {
+    'publication_communities': """
+        MATCH (k:Keyword) WHERE k.keyword IN $keywords
+            MATCH (x)-[t:TOPIC]->(k)
+            WITH x, toFloat(sum(t.papers)) AS totalAboutTopic
+                WITH x, totalAboutTopic / toFloat(x.num_of_papers) AS ratio
+                WHERE ratio > 0.9
+                RETURN COLLECT(x.title)
+    """,
+    'top_papers': """
+        CALL algo.pageRank.stream(
+            'MATCH (x)-[:HAS]->(p:Paper) WHERE x.title IN $publications AND EXISTS ((p)-[:CITED_BY]->())
+             RETURN id(p) AS id',
+            'MATCH (x)-[:HAS]->(p1:Paper)-[:CITED_BY]-(p2:Paper)<-[:HAS]-(y)
+             WHERE x.title IN $publications AND y.title IN $publications
+             RETURN id(p1) AS source, id(p2) AS target',
+            { graph: 'cypher', iterations: $iterations,
+              params: { publications: $publications } })
+        YIELD nodeId, score WITH nodeId, score
+        ORDER BY score DESC
+        MATCH (x:Paper) WHERE id(x) = nodeId
+        RETURN COLLECT(x.title)
+    """,
+    # The numpy engine pulls the same projection as plain id arrays
+    'venue_papers': """
+        UNWIND $publications AS title
+            OPTIONAL MATCH (c:Conference { title: title })-[:HAS]->(cp:Paper)
+            WITH title, collect(cp) AS conference_papers
+            OPTIONAL MATCH (j:Journal { title: title })-[:HAS]->(jp:Paper)
+            WITH conference_papers + collect(jp) AS papers
+            UNWIND papers AS p
+                WITH DISTINCT p
+                WHERE EXISTS ((p)-[:CITED_BY]->())
+                RETURN collect(id(p)), collect(p.title)
+    """,
+    'citation_edges': """
+        MATCH (p1:Paper)-[:CITED_BY]->(p2:Paper)
+        WHERE id(p1) IN $papers AND id(p2) IN $papers
+        RETURN collect(id(p1)), collect(id(p2))
+    """,
+    # Batch mode reads the statistics of every keyword once and derives the
+    # communities of each keyword set from them
+    'topic_statistics': """
+        MATCH (k:Keyword) WHERE k.keyword IN $keywords
+            MATCH (x)-[t:TOPIC]->(k)
+            RETURN collect([k.keyword, id(x), x.title, t.papers, x.num_of_papers])
+    """,
+    'authors': """
+        MATCH (a:Author)-[:WRITE]->(p:Paper)
+        WHERE p.title IN $papers
+        RETURN COLLECT(DISTINCT a.name)
+    """,
+    'graph_version': """
+        OPTIONAL MATCH (v:GraphVersion { name: 'graph' })
+        RETURN v.version
+    """,
+    'gurus': """
+        MATCH (a:Author)-[:WRITE]->(p:Paper)
+        WHERE p.title in $papers
+        WITH a.name AS name, COUNT(a.name) AS paperCount
+            WHERE paperCount >= $threshold
+            RETURN COLLECT(name)
+    """,
+}
+
+
+def parse_keywords(keywords):
+    # Accepts a list, a list literal such as "['data', 'sql']" or "data,sql",
+    # anything else raises ValueError
+    if isinstance(keywords, str):
+        keywords = keywords.strip()
+        if keywords.startswith('['):
+            try:
+                keywords = ast.literal_eval(keywords)
+            except (ValueError, SyntaxError):
+                raise ValueError(f'malformed keyword list {keywords!r}')
+        else:
+            keywords = keywords.split(',')
+    if not isinstance(keywords, (list, tuple)) or \
+            not all(isinstance(keyword, str) for keyword in keywords):
+        raise ValueError('keywords must be a list of strings')
+    return [keyword.strip().lower() for keyword in keywords if keyword.strip()]
+
+
+def read_keyword_sets(path):
+    # One keyword set per line, either bare keywords or a JSON object with a
+    # keywords field whose other fields are copied to the output
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            if line.startswith('{'):
+                request = json.loads(line)
+            else:
+                request = {'keywords': line}
+            request['keywords'] = parse_keywords(request['keywords'])
+            yield request
 
 
 class Query_Runner ():
 
-    def __init__(self, *args, **kwargs):
-        self.driver = GraphDatabase.driver(
-            os.getenv('NEO4J_URL'), auth=(os.getenv('NEO4J_USER'), os.getenv('NEO4J_PASSWORD')))
+    def __init__(self, cache=None, pagerank='plugin', driver=None,
+                 pool_size=None, plan_capture=None, database=None,
+                 pagerank_iterations=20, *args, **kwargs):
+        # A driver can be passed in, e.g. a fake one standing in for Neo4j
+        if driver is None:
+            config = {}
+            if pool_size is not None:
+                config['max_connection_pool_size'] = pool_size
+            driver = GraphDatabase.driver(
+                os.getenv('NEO4J_URL'), auth=(os.getenv('NEO4J_USER'), os.getenv('NEO4J_PASSWORD')),
+                **config)
+        self.driver = driver
+        # Part of every cache key, two databases may share a graph version
+        self.database = database or os.getenv('NEO4J_URL')
+        self.cache = cache if cache is not None else Result_Cache()
+        self.pagerank = pagerank
+        self.pagerank_engine = None
+        # Both engines run the same number of iterations, 20 is the plugin's
+        # default and neither is fully converged by then
+        self.pagerank_iterations = pagerank_iterations
+        # When a list, every query runs under PROFILE and its plan is kept
+        self.profiles = None
+        self.plan_capture = plan_capture
         return super().__init__(*args, **kwargs)
 
-    def get_publication_communities(self, keywords):
+    def run(self, name, **parameters):
+        return self.run_record(name, **parameters)[0]
+
+    def run_record(self, name, **parameters):
         with self.driver.session() as session:
-            return session.run(f"""
-                MATCH (x)-[:HAS]->(p:Paper)-[:HAS]->(k:Keyword)
-                WHERE k.keyword IN {keywords}
-                    WITH x, toFloat(COUNT(p)) AS totalAboutTopic
-                    MATCH (x)-[:HAS]->(p1:Paper)
-                        WITH x, totalAboutTopic, toFloat(COUNT(p1)) AS total, (totalAboutTopic / toFloat(COUNT(p1))) AS ratio
-                        WHERE ratio > 0.9
-                        RETURN COLLECT(x.title)
-            """).single()[0]
+            if self.profiles is None and self.plan_capture is None:
+                return session.run(QUERIES[name], parameters).single()
+            result = session.run(f'PROFILE {QUERIES[name]}', parameters)
+            record = result.single()
+            plan = result.summary().profile
+            if self.profiles is not None:
+                self.profiles.append((name, plan))
+            if self.plan_capture is not None:
+                self.plan_capture.add(name, 'PROFILE', QUERIES[name], plan)
+            return record
+
+    def cached(self, stage, arguments, compute, version):
+        # Loaders bump the graph version on every write, which moves every
+        # later lookup to a fresh key. A graph no loader wrote to has no
+        # version to tell it apart.
+        if version is None:
+            return compute()
+        key = self.cache.make_key(stage, arguments, self.database, version)
+        value = self.cache.get(key)
+        if value is None:
+            value = compute()
+            self.cache.put(key, value)
+        return value
+
+    def recommend_reviewers(self, keywords):
+        keywords = parse_keywords(keywords)
+        return self.cached('reviewers', sorted(set(keywords)), lambda: self.get_authors(
+            self.get_top_papers(self.get_publication_communities(keywords))),
+            self.run('graph_version'))
+
+    def recommend_gurus(self, keywords, threshold):
+        keywords = parse_keywords(keywords)
+        return self.cached('gurus', [sorted(set(keywords)), threshold], lambda: self.get_gurus(
+            self.get_top_papers(self.get_publication_communities(keywords)), threshold),
+            self.run('graph_version'))
+
+    def recommend_batch(self, requests, threshold=None):
+        # One graph version lookup and one statistics query serve the whole
+        # batch, communities, rankings and authors are shared between sets
+        requests = list(requests)
+        version = self.run('graph_version')
+        statistics = self.get_topic_statistics(
+            set(keyword for request in requests for keyword in request['keywords']))
+        communities, top_papers, authors, gurus = {}, {}, {}, {}
+
+        def rank(keywords):
+            topic = tuple(sorted(set(keywords)))
+            if topic not in communities:
+                communities[topic] = tuple(
+                    self.communities_from_statistics(statistics, topic))
+            venues = communities[topic]
+            if venues not in top_papers:
+                top_papers[venues] = tuple(self.get_top_papers(venues))
+            return top_papers[venues]
+
+        for request in requests:
+            keywords = request['keywords']
+            topic = sorted(set(keywords))
+
+            def compute_reviewers():
+                papers = rank(keywords)
+                if papers not in authors:
+                    authors[papers] = self.get_authors(papers)
+                return authors[papers]
+
+            result = dict(request)
+            result['reviewers'] = self.cached('reviewers', topic,
+                                              compute_reviewers, version)
+            if threshold is not None:
+                def compute_gurus():
+                    papers = rank(keywords)
+                    if papers not in gurus:
+                        gurus[papers] = self.get_gurus(papers, threshold)
+                    return gurus[papers]
+
+                result['gurus'] = self.cached('gurus', [topic, threshold],
+                                              compute_gurus, version)
+            yield result
+
+    def get_topic_statistics(self, keywords):
+        statistics = {}
+        for keyword, venue, title, papers, total in self.run(
+                'topic_statistics', keywords=sorted(keywords)):
+            statistics.setdefault(keyword, []).append((venue, title, papers, total))
+        return statistics
+
+    def communities_from_statistics(self, statistics, keywords):
+        # Same ratio as the publication_communities query, taken per venue
+        # node since every edition or volume of a venue shares its title
+        about_topic = Counter()
+        venues = {}
+        for keyword in keywords:
+            for venue, title, papers, total in statistics.get(keyword, []):
+                about_topic[venue] += papers
+                venues[venue] = (title, total)
+        return sorted(set(venues[venue][0] for venue, papers in about_topic.items()
+                          if venues[venue][1] and papers / venues[venue][1] > 0.9))
+
+    def get_publication_communities(self, keywords):
+        return self.run('publication_communities',
+                        keywords=parse_keywords(keywords))
 
     def get_top_papers(self, publications):
-        with self.driver.session() as session:
-            config = "{ graph: 'cypher' }"
-            return session.run(f"""
-                CALL algo.pageRank.stream(
-                    'MATCH (p:Paper) WHERE EXISTS ((p)-[:CITED_BY]->()) RETURN id(p) AS id',
-                    "MATCH (p1:Paper)-[:CITED_BY]-(p2:Paper) WHERE (p1 IN {publications}) AND (p2 IN {publications})
-                     RETURN id(p1) AS source, id(p2) AS target",
-    	            {config})
-                YIELD nodeId, score WITH nodeId, score
-                ORDER BY score DESC
-                MATCH (x:Paper) WHERE id(x) = nodeId
-                RETURN COLLECT(x.title)
-            """).single()[0]
+        if self.pagerank == 'numpy':
+            return self.get_top_papers_numpy(publications)
+        return self.run('top_papers', publications=list(publications),
+                        iterations=self.pagerank_iterations)
+
+    def get_top_papers_numpy(self, publications):
+        papers, titles = self.run_record('venue_papers',
+                                         publications=list(publications))
+        sources, targets = self.run_record('citation_edges', papers=papers)
+        if self.pagerank_engine is None:
+            from pagerank import PageRank
+            self.pagerank_engine = PageRank(
+                max_iterations=self.pagerank_iterations)
+        # The plugin projection matches CITED_BY in both directions
+        scores = self.pagerank_engine.rank(
+            papers, sources + targets, targets + sources)
+        return [titles[i] for i in sorted(range(len(papers)),
+                                          key=lambda i: -scores[i])]
 
     def get_authors(self, papers):
-        with self.driver.session() as session:
-            return session.run(f"""
-                MATCH (a:Author)-[:WRITE]->(p:Paper)
-                WHERE p.title IN {papers}
-                RETURN COLLECT(DISTINCT a.name)
-            """).single()[0]
+        return self.run('authors', papers=list(papers))
 
     def get_gurus(self, papers, threshold):
-        with self.driver.session() as session:
-            return session.run(f"""
-                MATCH (a:Author)-[:WRITE]->(p:Paper)
-                WHERE p.title in {papers}
-                WITH a.name AS name, COUNT(a.name) AS paperCount
-                    WHERE paperCount >= {threshold}
-                    RETURN COLLECT(name)
-            """).single()[0]
+        return self.run('gurus', papers=list(papers), threshold=threshold)
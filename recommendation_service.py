@@ -0,0 +1,129 @@
+import json
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit, parse_qs
+from query_runner import parse_keywords
+
+
+REASONS = {
+    200: 'OK',
+    400: 'Bad Request',
+    404: 'Not Found',
+    405: 'Method Not Allowed',
+    500: 'Internal Server Error',
+}
+
+
+class Recommendation_Service():
+
+    def __init__(self, query_runner, host='127.0.0.1', port=8080, workers=32,
+                 *args, **kwargs):
+        # Query_Runner is blocking, its calls run on a thread pool no larger
+        # than the driver's connection pool while the event loop keeps
+        # accepting requests
+        self.query_runner = query_runner
+        self.host = host
+        self.port = port
+        self.executor = ThreadPoolExecutor(max_workers=workers)
+        self.loop = None
+        self.listening = threading.Event()
+        return super().__init__(*args, **kwargs)
+
+    def recommend(self, path, query):
+        if path not in ('/reviewers', '/gurus'):
+            return 404, {'error': f'unknown path {path}'}
+        if 'keywords' not in query:
+            return 400, {'error': 'keywords is required'}
+        try:
+            keywords = parse_keywords(query['keywords'][0])
+        except ValueError as e:
+            return 400, {'error': str(e)}
+        if path == '/reviewers':
+            return 200, {'keywords': keywords,
+                         'reviewers': self.query_runner.recommend_reviewers(keywords)}
+        try:
+            threshold = int(query.get('threshold', ['1'])[0])
+        except ValueError:
+            return 400, {'error': 'threshold must be an integer'}
+        return 200, {'keywords': keywords,
+                     'gurus': self.query_runner.recommend_gurus(keywords, threshold)}
+
+    async def respond(self, method, target):
+        if method != 'GET':
+            return 405, {'error': 'only GET is supported'}
+        url = urlsplit(target)
+        loop = asyncio.get_event_loop()
+        try:
+            return await loop.run_in_executor(
+                self.executor, self.recommend, url.path, parse_qs(url.query))
+        except Exception as e:
+            return 500, {'error': str(e)}
+
+    async def handle(self, reader, writer):
+        # HTTP/1.1 with keep-alive, so clients can reuse their connection
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+                if 'content-length' in headers:
+                    await reader.readexactly(int(headers['content-length']))
+
+                try:
+                    method, target, version = request_line.decode('latin-1').split()
+                except ValueError:
+                    status, body = 400, {'error': 'malformed request line'}
+                    version = 'HTTP/1.0'
+                else:
+                    status, body = await self.respond(method, target)
+
+                keep_alive = version == 'HTTP/1.1' and \
+                    headers.get('connection', '').lower() != 'close'
+                payload = json.dumps(body).encode('utf-8')
+                writer.write((
+                    f'HTTP/1.1 {status} {REASONS[status]}\r\n'
+                    'Content-Type: application/json\r\n'
+                    f'Content-Length: {len(payload)}\r\n'
+                    f'Connection: {"keep-alive" if keep_alive else "close"}\r\n'
+                    '\r\n').encode('latin-1') + payload)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def start(self):
+        return await asyncio.start_server(self.handle, self.host, self.port,
+                                          backlog=1024)
+
+    def shutdown(self):
+        # Stops serve() from another thread
+        if self.loop is not None:
+            self.loop.call_soon_threadsafe(self.loop.stop)
+
+    def serve(self):
+        loop = self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        server = loop.run_until_complete(self.start())
+        print(f'Serving recommendations on http://{self.host}:{self.port}')
+        self.listening.set()
+        try:
+            loop.run_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.close()
+            loop.run_until_complete(server.wait_closed())
+            self.executor.shutdown()
+            self.query_runner.driver.close()
+            loop.close()
@@ -0,0 +1,69 @@
+import json
+import time
+import threading
+from collections import OrderedDict
+from sqlite_store import SQLite_Store
+
+
+class Result_Cache(SQLite_Store):
+
+    schema = [
+        """
+        CREATE TABLE IF NOT EXISTS results (
+            key TEXT PRIMARY KEY, value TEXT, created REAL)
+        """,
+    ]
+    # The service's worker threads share the connection under self.lock
+    check_same_thread = False
+
+    def __init__(self, max_entries=1024, ttl=3600, path=None, *args, **kwargs):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        return super().__init__(path, *args, **kwargs)
+
+    def make_key(self, *parts):
+        return json.dumps(parts, sort_keys=True)
+
+    def is_fresh(self, created):
+        return self.ttl is None or time.time() - created < self.ttl
+
+    def get(self, key):
+        with self.lock:
+            if key in self.entries:
+                created, value = self.entries[key]
+                if self.is_fresh(created):
+                    self.entries.move_to_end(key)
+                    return value
+                del self.entries[key]
+
+            if self.path:
+                row = self.connect().execute(
+                    'SELECT value, created FROM results WHERE key = ?', (key,)).fetchone()
+                if row and self.is_fresh(row[1]):
+                    value = json.loads(row[0])
+                    self.remember(key, row[1], value)
+                    return value
+        return None
+
+    def put(self, key, value):
+        with self.lock:
+            created = time.time()
+            self.remember(key, created, value)
+            if self.path:
+                connection = self.connect()
+                with connection:
+                    connection.execute('INSERT OR REPLACE INTO results VALUES (?, ?, ?)',
+                                       (key, json.dumps(value), created))
+                    connection.execute("""
+                        DELETE FROM results WHERE key NOT IN (
+                            SELECT key FROM results ORDER BY created DESC LIMIT ?)
+                    """, (self.max_entries,))
+
+    def remember(self, key, created, value):
+        # Least recently used entries are evicted first
+        self.entries[key] = (created, value)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
@@ -0,0 +1,33 @@
+import numpy as np
+
+
+class Reviewer_Sampler():
+
+    def __init__(self, population, seed=None, max_attempts=10, *args, **kwargs):
+        self.population = np.asarray(population, dtype=object)
+        self.random = np.random.RandomState(seed)
+        self.max_attempts = max_attempts
+        return super().__init__(*args, **kwargs)
+
+    def sample(self, authors, k=3):
+        if not len(self.population):
+            return []
+        excluded = set(authors)
+
+        # Draw from the whole population and reject the paper's own authors,
+        # which only costs O(k) per paper while conflicts are rare
+        reviewers = []
+        for _ in range(self.max_attempts):
+            draws = self.random.randint(0, len(self.population), size=2 * k)
+            reviewers.extend(reviewer for reviewer in self.population[draws]
+                             if reviewer not in excluded)
+            if len(reviewers) >= k:
+                return reviewers[:k]
+
+        # Most of the population is excluded, fall back to filtering it
+        candidates = [reviewer for reviewer in self.population
+                      if reviewer not in excluded]
+        if not candidates:
+            return []
+        draws = self.random.randint(0, len(candidates), size=k)
+        return [candidates[draw] for draw in draws]
@@ -0,0 +1,75 @@
+from neo4j.exceptions import ClientError
+
+
+# Uniqueness constraints also provide the index used by MERGE and MATCH
+CONSTRAINTS = [
+    ('Paper', 'key'),
+    ('Author', 'name'),
+    ('Keyword', 'keyword'),
+    ('Organization', 'name'),
+]
+
+INDEXES = [
+    ('Conference', ['title']),
+    ('Conference', ['title', 'startDate']),
+    ('Journal', ['title']),
+    ('Journal', ['title', 'date', 'volume']),
+]
+
+# Operators no per-row load statement should plan
+FORBIDDEN_OPERATORS = ['CartesianProduct', 'NodeByLabelScan', 'AllNodesScan']
+
+
+def plan_operators(plan):
+    yield plan.operator_type
+    for child in plan.children:
+        yield from plan_operators(child)
+
+
+def plan_db_hits(plan):
+    # Only profiled plans carry db hits
+    return getattr(plan, 'db_hits', 0) + sum(
+        plan_db_hits(child) for child in plan.children)
+
+
+class Schema_Manager():
+
+    def __init__(self, driver, *args, **kwargs):
+        self.driver = driver
+        return super().__init__(*args, **kwargs)
+
+    def create(self):
+        print('Creating constraints and indexes...')
+        with self.driver.session() as session:
+            for label, property in CONSTRAINTS:
+                # A plain index on the property would block the constraint
+                try:
+                    session.run(f'DROP INDEX ON :{label}({property})').consume()
+                except ClientError:
+                    pass
+                session.run(f"""
+                    CREATE CONSTRAINT ON (n:{label}) ASSERT n.{property} IS UNIQUE
+                """).consume()
+            for label, properties in INDEXES:
+                session.run(
+                    f'CREATE INDEX ON :{label}({", ".join(properties)})').consume()
+            session.run('CALL db.awaitIndexes()').consume()
+        print('Constraints and indexes created.')
+
+    def explain(self, query, **parameters):
+        with self.driver.session() as session:
+            summary = session.run(f'EXPLAIN {query}', parameters).summary()
+        return list(plan_operators(summary.plan))
+
+    def verify(self, queries, label_scans=()):
+        # Map of statement name to the forbidden operators found in its plan,
+        # statements in label_scans update a whole label and may scan it
+        violations = {}
+        for name, query in queries.items():
+            forbidden = [operator for operator in FORBIDDEN_OPERATORS
+                         if name not in label_scans or operator != 'NodeByLabelScan']
+            operators = [operator for operator in self.explain(query, rows=[])
+                         if operator.split('@')[0] in forbidden]
+            if operators:
+                violations[name] = operators
+        return violations
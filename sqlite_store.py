@@ -0,0 +1,30 @@
+import os
+import sqlite3
+
+
+class SQLite_Store():
+
+    # Statements run on every new connection, i.e. CREATE ... IF NOT EXISTS
+    schema = []
+    # Stores shared between threads serialize their own access
+    check_same_thread = True
+
+    def __init__(self, path, *args, **kwargs):
+        self.path = path
+        self.connection = None
+        self.pid = None
+        return super().__init__(*args, **kwargs)
+
+    def connect(self):
+        # SQLite connections cannot cross a fork, every process opens its own
+        if self.connection is None or self.pid != os.getpid():
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self.connection = sqlite3.connect(
+                self.path, timeout=60, check_same_thread=self.check_same_thread)
+            self.connection.execute('PRAGMA journal_mode=WAL')
+            for statement in self.schema:
+                self.connection.execute(statement)
+            self.pid = os.getpid()
+        return self.connection
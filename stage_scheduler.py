@@ -0,0 +1,74 @@
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+
+class Stage():
+
+    def __init__(self, name, function, inputs=(), outputs=(), *args, **kwargs):
+        self.name = name
+        self.function = function
+        self.inputs = set(inputs)
+        self.outputs = set(outputs)
+        self.dependencies = set()
+        return super().__init__(*args, **kwargs)
+
+    def depends_on(self, stage):
+        # Read after write, write after write and write after read all keep
+        # the order in which the stages were declared
+        return bool(self.inputs & stage.outputs or
+                    self.outputs & stage.outputs or
+                    self.outputs & stage.inputs)
+
+
+class Stage_Scheduler():
+
+    def __init__(self, jobs=1, processes=False, report=None, *args, **kwargs):
+        self.jobs = jobs
+        self.processes = processes
+        # A Run_Report measures every stage where it runs
+        self.report = report
+        self.stages = []
+        return super().__init__(*args, **kwargs)
+
+    def add(self, name, function, inputs=(), outputs=()):
+        stage = Stage(name, function, inputs, outputs)
+        stage.dependencies = set(previous.name for previous in self.stages
+                                 if stage.depends_on(previous))
+        self.stages.append(stage)
+        return stage
+
+    def submit(self, stage, executor=None):
+        function = stage.function
+        if self.report is not None:
+            self.report.start(stage.name)
+            function = self.report.wrap(stage.name, function)
+        if executor is None:
+            return function()
+        return executor.submit(function)
+
+    def finish(self, result):
+        if self.report is not None:
+            self.report.finish(result)
+
+    def run(self):
+        if self.jobs <= 1:
+            for stage in self.stages:
+                self.finish(self.submit(stage))
+            return
+
+        executor_class = ProcessPoolExecutor if self.processes else ThreadPoolExecutor
+        pending = list(self.stages)
+        running = {}
+        done = set()
+        with executor_class(max_workers=self.jobs) as executor:
+            while pending or running:
+                # Start every stage whose dependencies have all finished
+                for stage in list(pending):
+                    if stage.dependencies <= done:
+                        pending.remove(stage)
+                        running[self.submit(stage, executor)] = stage
+
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    stage = running.pop(future)
+                    self.finish(future.result())
+                    done.add(stage.name)
@@ -0,0 +1,54 @@
+import pytest
+from pagerank import PageRank
+
+
+# The example graph of the graph algorithms PageRank documentation
+NODES = ['Home', 'About', 'Product', 'Links', 'Site A', 'Site B', 'Site C',
+         'Site D']
+EDGES = [('Home', 'About'), ('Home', 'Links'), ('Home', 'Product'),
+         ('About', 'Home'), ('Product', 'Home'), ('Site A', 'Home'),
+         ('Site B', 'Home'), ('Site C', 'Home'), ('Site D', 'Home'),
+         ('Links', 'Home'), ('Links', 'Site A'), ('Links', 'Site B'),
+         ('Links', 'Site C'), ('Links', 'Site D')]
+
+# algo.pageRank.stream scores with its defaults, 20 iterations and 0.85 damping
+PLUGIN_SCORES = {
+    'Home': 3.2362017153762284,
+    'About': 1.0611098567023873,
+    'Product': 1.0611098567023873,
+    'Links': 1.0611098567023873,
+    'Site A': 0.3292259009438567,
+    'Site B': 0.3292259009438567,
+    'Site C': 0.3292259009438567,
+    'Site D': 0.3292259009438567,
+}
+
+
+def rank(engine):
+    ids = [10 * i for i in range(len(NODES))]
+    index = dict(zip(NODES, ids))
+    return engine.rank(ids, [index[source] for source, _ in EDGES],
+                       [index[target] for _, target in EDGES])
+
+
+def test_matches_plugin_scores():
+    engine = PageRank()
+    scores = rank(engine)
+    assert engine.iterations == 20
+    for node, score in zip(NODES, scores):
+        assert score == pytest.approx(PLUGIN_SCORES[node], rel=1e-6)
+
+
+def test_warm_start_keeps_the_ranking():
+    engine = PageRank()
+    rank(engine)
+    scores = rank(engine)
+    ranking = sorted(NODES, key=lambda node: -scores[NODES.index(node)])
+    assert ranking[0] == 'Home'
+    assert set(ranking[-4:]) == {'Site A', 'Site B', 'Site C', 'Site D'}
+
+
+def test_no_iterations():
+    engine = PageRank(max_iterations=0)
+    assert list(rank(engine)) == pytest.approx([0.15] * len(NODES))
+    assert engine.iterations == 0
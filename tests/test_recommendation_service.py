@@ -0,0 +1,181 @@
+import json
+import time
+import socket
+import threading
+import http.client
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from query_runner import QUERIES, Query_Runner
+from result_cache import Result_Cache
+from recommendation_service import Recommendation_Service
+
+
+# Single-value answers per named query
+ANSWERS = {
+    'graph_version': '5f0c6a1e-2b7d-4c39-9a52-0f3e8d1b7c44',
+    'publication_communities': ['VLDB'],
+    'top_papers': ['Paper A', 'Paper B'],
+    'authors': ['Alice', 'Bob'],
+    'gurus': ['Alice'],
+}
+
+
+class Fake_Result():
+
+    def __init__(self, value):
+        self.value = value
+
+    def single(self):
+        return [self.value]
+
+
+class Fake_Session():
+
+    def __init__(self, driver):
+        self.driver = driver
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        pass
+
+    def run(self, query, parameters=None):
+        name = next(name for name, text in QUERIES.items() if text == query)
+        with self.driver.lock:
+            self.driver.queries.append((name, parameters))
+        time.sleep(self.driver.latency)
+        return Fake_Result(self.driver.answers[name])
+
+
+class Fake_Driver():
+
+    def __init__(self, latency=0, answers=ANSWERS):
+        self.latency = latency
+        self.answers = answers
+        self.queries = []
+        self.lock = threading.Lock()
+        self.closed = False
+
+    def session(self):
+        return Fake_Session(self)
+
+    def close(self):
+        self.closed = True
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+@pytest.fixture
+def driver():
+    return Fake_Driver()
+
+
+@pytest.fixture
+def service(driver):
+    runner = Query_Runner(cache=Result_Cache(), driver=driver)
+    service = Recommendation_Service(runner, port=free_port(), workers=32)
+    thread = threading.Thread(target=service.serve, daemon=True)
+    thread.start()
+    assert service.listening.wait(5)
+    yield service
+    service.shutdown()
+    thread.join(5)
+
+
+def get(service, path):
+    connection = http.client.HTTPConnection(service.host, service.port, timeout=10)
+    try:
+        connection.request('GET', path)
+        response = connection.getresponse()
+        return response.status, json.loads(response.read())
+    finally:
+        connection.close()
+
+
+def test_reviewers(service, driver):
+    status, body = get(service, '/reviewers?keywords=Data,SQL')
+    assert status == 200
+    assert body == {'keywords': ['data', 'sql'], 'reviewers': ['Alice', 'Bob']}
+    communities = [parameters for name, parameters in driver.queries
+                   if name == 'publication_communities']
+    assert communities == [{'keywords': ['data', 'sql']}]
+
+
+def test_gurus(service, driver):
+    status, body = get(service, '/gurus?keywords=data&threshold=2')
+    assert status == 200
+    assert body == {'keywords': ['data'], 'gurus': ['Alice']}
+    assert ('gurus', {'papers': ['Paper A', 'Paper B'], 'threshold': 2}) in driver.queries
+
+
+def test_results_are_cached(service, driver):
+    get(service, '/reviewers?keywords=data')
+    get(service, '/reviewers?keywords=data')
+    names = [name for name, _ in driver.queries]
+    assert names.count('publication_communities') == 1
+
+
+def test_cache_is_keyed_on_database():
+    # Both graphs carry the same version, only the database tells them apart
+    cache = Result_Cache()
+    first, second = Fake_Driver(), Fake_Driver()
+    Query_Runner(cache=cache, driver=first,
+                 database='bolt://old:7687').recommend_reviewers('data')
+    Query_Runner(cache=cache, driver=second,
+                 database='bolt://new:7687').recommend_reviewers('data')
+    assert ('publication_communities', {'keywords': ['data']}) in second.queries
+
+
+def test_unversioned_graph_is_not_cached():
+    driver = Fake_Driver(answers=dict(ANSWERS, graph_version=None))
+    runner = Query_Runner(cache=Result_Cache(), driver=driver)
+    runner.recommend_reviewers('data')
+    runner.recommend_reviewers('data')
+    names = [name for name, _ in driver.queries]
+    assert names.count('publication_communities') == 2
+
+
+@pytest.mark.parametrize('path', [
+    '/reviewers',
+    '/reviewers?keywords=%5B1%5D',
+    '/reviewers?keywords=%5Bdata',
+    '/gurus?keywords=data&threshold=many',
+])
+def test_bad_requests(service, path):
+    status, body = get(service, path)
+    assert status == 400
+    assert 'error' in body
+
+
+def test_unknown_path(service):
+    status, body = get(service, '/papers?keywords=data')
+    assert status == 404
+
+
+def test_keep_alive(service):
+    connection = http.client.HTTPConnection(service.host, service.port, timeout=10)
+    for _ in range(3):
+        connection.request('GET', '/reviewers?keywords=data')
+        response = connection.getresponse()
+        assert response.status == 200
+        response.read()
+    connection.close()
+
+
+def test_concurrent_requests(service, driver):
+    # Every query takes 50ms and a recommendation runs four of them, served
+    # one at a time 40 requests would take 8s
+    driver.latency = 0.05
+    paths = [f'/reviewers?keywords=topic{i}' for i in range(40)]
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=40) as executor:
+        results = list(executor.map(lambda path: get(service, path), paths))
+    elapsed = time.perf_counter() - start
+    assert [status for status, _ in results] == [200] * 40
+    assert [body['keywords'] for _, body in results] == [[f'topic{i}'] for i in range(40)]
+    assert elapsed < 5
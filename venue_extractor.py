@@ -0,0 +1,128 @@
+import os
+import csv
+import glob
+import hashlib
+from collections import deque
+
+
+class Aho_Corasick():
+
+    def __init__(self, patterns, *args, **kwargs):
+        # Trie nodes are (transitions, failure link, lengths of patterns ending here)
+        self.transitions = [{}]
+        self.failures = [0]
+        self.outputs = [[]]
+        for pattern in patterns:
+            self.add(pattern)
+        self.build()
+        return super().__init__(*args, **kwargs)
+
+    def add(self, pattern):
+        node = 0
+        for character in pattern:
+            if character not in self.transitions[node]:
+                self.transitions.append({})
+                self.failures.append(0)
+                self.outputs.append([])
+                self.transitions[node][character] = len(self.transitions) - 1
+            node = self.transitions[node][character]
+        self.outputs[node].append(len(pattern))
+
+    def build(self):
+        queue = deque(self.transitions[0].values())
+        while queue:
+            node = queue.popleft()
+            for character, child in self.transitions[node].items():
+                queue.append(child)
+                failure = self.failures[node]
+                while failure and character not in self.transitions[failure]:
+                    failure = self.failures[failure]
+                self.failures[child] = self.transitions[failure].get(
+                    character, 0)
+                if self.failures[child] == child:
+                    self.failures[child] = 0
+                self.outputs[child] = self.outputs[child] + \
+                    self.outputs[self.failures[child]]
+
+    def find(self, text):
+        node = 0
+        for end, character in enumerate(text, 1):
+            while node and character not in self.transitions[node]:
+                node = self.failures[node]
+            node = self.transitions[node].get(character, 0)
+            for length in self.outputs[node]:
+                yield end - length, end
+
+
+def is_word_boundary(text, start, end):
+    return (start == 0 or not text[start - 1].isalnum()) and \
+        (end == len(text) or not text[end].isalnum())
+
+
+def read_gazetteer(path):
+    # Either one city per line, or a CSV with a city_name column such as
+    # the GeoLite2 locations file geograpy is built from
+    with open(path, encoding='utf-8') as f:
+        if path.endswith('.csv'):
+            cities = [row['city_name'] for row in csv.DictReader(f)]
+        else:
+            cities = [line.strip() for line in f]
+    return sorted(set(city for city in cities if city))
+
+
+def export_geograpy_gazetteer(path):
+    import geograpy
+    data_dir = os.path.dirname(geograpy.__file__)
+    files = glob.glob(os.path.join(data_dir, '**', '*City-Locations*.csv'),
+                      recursive=True)
+    if not files:
+        raise FileNotFoundError(
+            f'No city locations file found under {data_dir}')
+
+    cities = set()
+    for file in files:
+        cities.update(read_gazetteer(file))
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('\n'.join(sorted(cities)))
+    return len(cities)
+
+
+class Gazetteer_Venue_Extractor():
+
+    def __init__(self, path='input/cities.txt', *args, **kwargs):
+        with open(path, 'rb') as f:
+            self.version = 'gazetteer-' + hashlib.sha1(f.read()).hexdigest()
+        self.matcher = Aho_Corasick(read_gazetteer(path))
+        return super().__init__(*args, **kwargs)
+
+    def extract_cities(self, title):
+        # Keep leftmost-longest whole-word matches, like a NE chunk would
+        matches = sorted((match for match in self.matcher.find(title)
+                          if is_word_boundary(title, *match)),
+                         key=lambda match: (match[0], match[0] - match[1]))
+        cities = []
+        position = 0
+        for start, end in matches:
+            if start >= position:
+                cities.append(title[start:end])
+                position = end
+        return cities
+
+    def extract(self, titles):
+        venues = []
+        for title in titles:
+            cities = self.extract_cities(str(title))
+            venues.append(','.join(cities) if cities else None)
+        return venues
+
+
+def compare_with_geograpy(extractor, titles, extract_venue):
+    # Share of titles where both extractors find the same cities
+    titles = list(titles)
+    mismatches = []
+    for title, venue in zip(titles, extractor.extract(titles)):
+        expected = extract_venue(title)
+        if venue != expected:
+            mismatches.append((title, expected, venue))
+    agreement = 1 - len(mismatches) / len(titles) if titles else 1.0
+    return agreement, mismatches